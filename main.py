@@ -18,7 +18,13 @@ from menu.setting import SettingsPage
 from menu.help import HelpPage
 from menu.detail import DetailPage
 
-from script.pars import AnimeLoaderThread
+from script.sync import SyncThread
+from script.random_pool import RandomPool
+from script.loader_manager import LoaderManager
+from script.catalog import catalog
+from script.pars import set_display_ratio
+from script.scheduler import scheduler
+from script.image_decoder import image_decoder
 from script.splash import SplashScreen, LoaderThread
 
 # Get absolute path to data directory
@@ -52,6 +58,11 @@ class MainWindow(QWidget):
         self.timer.timeout.connect(self.move_stars)
         self.anime_loader = None
         self.loading_overlay = None
+        self.random_items = []
+        self.top_page_shown = False
+        self.sync_thread = None
+        self.random_pool = RandomPool(parent=self)
+        self.loader_manager = LoaderManager(max_threads=3, parent=self)
         self.star_count = 15
 
         # Font management
@@ -163,30 +174,79 @@ class MainWindow(QWidget):
 
     def show_anime_details(self, anime_data):
         detail_page = self.pages["detail"]
+        detail_page.main_window = self
         detail_page.set_data(anime_data)
         detail_page.apply_theme(self.current_theme)
         self.switch_page("detail")
         detail_page.back_callback = lambda: self.switch_page("home")
         detail_page.main_window = self
 
+    def handle_top_page(self, page, items):
+        # The home grid only needs the first page; later pages go to the catalog
+        if page == 1:
+            self.pages["home"].show_first_page(items)
+            self.top_page_shown = True
+
     def on_parsing_finished(self):
-        self.pages["home"].load_anime_data()
+        if not self.top_page_shown:
+            self.pages["home"].load_anime_data()
         self.cleanup_loader()
+        self.start_catalog_sync()
+        self.random_pool.refill()
+
+    def start_catalog_sync(self):
+        """Merge titles changed since the last run into the catalog in the background"""
+        if self.sync_thread and self.sync_thread.isRunning():
+            return
+        self.sync_thread = SyncThread(self)
+        self.sync_thread.start()
+
+    def shutdown(self):
+        """Stop background threads before the window (their parent) is destroyed"""
+        # Threads queued for a network slot would otherwise wait for posters that
+        # can only finish on the event loop this method is blocking
+        scheduler.shutdown()
+        if self.sync_thread and self.sync_thread.isRunning():
+            self.sync_thread.requestInterruption()
+            self.sync_thread.wait()
+        self.loader_manager.shutdown()
+        self.random_pool.stop()
+        # Last: the threads above may still have queued poster decodes
+        image_decoder.shutdown()
+
+    def closeEvent(self, event):
+        self.shutdown()
+        super().closeEvent(event)
 
     def load_random_anime(self):
+        # Served instantly when the background pool has enough titles ready
+        entries = self.random_pool.take(12)
+        if entries:
+            self.loader_manager.cancel_group("random")
+            items = [item for item, _ in entries]
+            catalog.upsert(items, list_name="random")
+            catalog.clear_list("random", from_position=len(items))
+            self.pages["explore"].show_prefetched(entries)
+            return
+
         try:
             # Only create new overlay if needed
             if not hasattr(self, 'loading_overlay') or not self.loading_overlay:
                 self.loading_overlay = LoadingOverlay(self)
             self.loading_overlay.show()
 
-            # Create new loader instance for random anime
-            random_loader = AnimeLoaderThread()
-            random_loader.mode = "random"
-            random_loader.random_data_loaded.connect(self.handle_random_data)
-            random_loader.error_occurred.connect(self.show_error)
-            random_loader.finished.connect(self.cleanup_loader)
-            random_loader.start()
+            # Repeated clicks join the request already in flight
+            if not self.loader_manager.in_flight("random"):
+                self.random_items = []
+            self.loader_manager.submit(
+                "random",
+                handlers={
+                    "random_item_loaded": self.handle_random_item,
+                    "random_data_loaded": self.handle_random_data,
+                    "error_occurred": self.show_error,
+                },
+                on_finished=self.cleanup_loader
+            )
 
         except Exception as e:
             self.cleanup_loader()
@@ -200,8 +260,22 @@ class MainWindow(QWidget):
             self.loading_overlay.deleteLater()
             self.loading_overlay = None
 
+    def handle_random_item(self, item):
+        explore = self.pages["explore"]
+        if not self.random_items:
+            # First result: clear the old grid and drop the overlay
+            explore.create_anime_cards([])
+            self.cleanup_loader()
+        self.random_items.append(item)
+        # Previews stored on an earlier run, painted until the poster arrives
+        catalog.merge_previews([item])
+        explore.add_anime_card(item)
+
     def handle_random_data(self, data):
-        self.pages["explore"].create_anime_cards(data)
+        # Cards were already added one by one as they arrived
+        if self.random_items:
+            return
+        self.pages["explore"].create_anime_cards(catalog.merge_previews(data))
 
     def show_error(self, message):
         QMessageBox.critical(self, "Error",
@@ -311,6 +385,8 @@ if __name__ == "__main__":
         )
 
     app = QApplication(sys.argv)
+    # Grid posters are picked for this screen's pixel density
+    set_display_ratio(app.primaryScreen().devicePixelRatio())
 
     # Create demo data with absolute path
     demo_file = DATA_DIR / "random.json"
@@ -336,6 +412,8 @@ if __name__ == "__main__":
     # Main window
     window = MainWindow()
     window.setVisible(False)
+    # Quitting without closing the window (e.g. from the splash) stops the threads too
+    app.aboutToQuit.connect(window.shutdown)
 
     loader = LoaderThread()
 
@@ -346,11 +424,14 @@ if __name__ == "__main__":
         window.activateWindow()
 
         # Create and start loader
-        window.anime_loader = AnimeLoaderThread()
-        window.anime_loader.error_occurred.connect(window.show_error)
-        window.anime_loader.finished.connect(window.on_parsing_finished)
-        window.anime_loader.mode = "top"
-        window.anime_loader.start()
+        window.anime_loader = window.loader_manager.submit(
+            "top",
+            handlers={
+                "error_occurred": window.show_error,
+                "page_loaded": window.handle_top_page,
+            },
+            on_finished=window.on_parsing_finished
+        )
 
 
     def handle_progress(value, message):
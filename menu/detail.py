@@ -3,8 +3,10 @@ from PySide6.QtWidgets import (
     QHBoxLayout, QComboBox, QScrollArea, QLabel, QTextBrowser
 )
 from PySide6.QtGui import QPixmap, QPainter, QPainterPath, QColor, QFont
-from PySide6.QtCore import Qt, QRectF, QUrl
-from PySide6.QtNetwork import QNetworkAccessManager, QNetworkRequest, QNetworkReply
+from PySide6.QtCore import Qt, QRectF
+
+from script.pars import AnimeLoaderThread
+from script.poster_fetcher import poster_fetcher
 
 
 class RoundedImageWidget(QWidget):
@@ -38,8 +40,10 @@ class DetailPage(QWidget):
         self.back_callback = None
         self.main_window = None
         self.theme = "space"
+        self.data = {}
+        self.episodes_loader = None
+        self.poster_request = None
         self.setup_ui()
-        self.network_manager = QNetworkAccessManager(self)
 
     def setup_ui(self):
         layout = QVBoxLayout(self)
@@ -156,17 +160,43 @@ class DetailPage(QWidget):
         self.apply_theme(self.theme)
 
     def set_data(self, data):
+        self.data = data
         self.title.setText(data.get("title", "Назва відсутня"))
         self.genre.setText(f"Жанр: {data.get('genre', 'Невідомо')}")
         self.status.setText(f"Статус: {data.get('status', 'Невідомо')}")
         self.description.setText(data.get("description", "Опис відсутній"))
 
-        image_path = data.get("image", "")
-        self.load_image_async(image_path)
+        # Grids use a card-sized variant, the detail page shows the full poster
+        self.load_image_async(self.poster_path())
+
+        # List views only carry summary fields; the playlist is fetched when the page opens
+        if data.get("id") is not None and "episodes" not in data:
+            self.load_episodes(data["id"])
 
         if self.main_window:
             self.apply_font(self.main_window.current_font)
 
+    def load_episodes(self, title_id):
+        if self.main_window:
+            # Opening another title supersedes the previous playlist request
+            self.main_window.loader_manager.submit(
+                "episodes",
+                handlers={"episodes_loaded": self.handle_episodes},
+                title_id=title_id
+            )
+            return
+
+        self.episodes_loader = AnimeLoaderThread(self)
+        self.episodes_loader.mode = "episodes"
+        self.episodes_loader.title_id = title_id
+        self.episodes_loader.episodes_loaded.connect(self.handle_episodes)
+        self.episodes_loader.start()
+
+    def handle_episodes(self, title_id, episodes):
+        # Ignore late answers for a title that is no longer shown
+        if self.data.get("id") == title_id:
+            self.data["episodes"] = episodes
+
     def apply_theme(self, theme_name):
         self.theme = theme_name
         theme_styles = {
@@ -274,15 +304,18 @@ class DetailPage(QWidget):
         """)
 
     def load_image_async(self, image_path):
+        if self.poster_request is not None:
+            # The previous title's poster is no longer needed
+            poster_fetcher.cancel(self.poster_request)
+            self.poster_request = None
+
         if not image_path:
             self.set_default_image()
             return
 
         if image_path.startswith("http") or image_path.startswith("/"):
-            url = self.resolve_url(image_path)
-            request = QNetworkRequest(QUrl(url))
-            reply = self.network_manager.get(request)
-            reply.finished.connect(lambda: self.handle_image_response(reply))
+            # Full-size poster, decoded off the GUI thread by the shared fetcher
+            self.poster_request = poster_fetcher.fetch(self.resolve_url(image_path), None, self.show_poster)
         else:
             pixmap = QPixmap(image_path)
             if pixmap.isNull():
@@ -290,6 +323,15 @@ class DetailPage(QWidget):
             else:
                 self.set_poster_pixmap(pixmap)
 
+    def show_poster(self, image):
+        if image is None:
+            self.set_default_image()
+        else:
+            self.set_poster_pixmap(QPixmap.fromImage(image))
+
+    def poster_path(self):
+        return self.data.get("image_original") or self.data.get("image", "")
+
     def resolve_url(self, path):
         if path.startswith("//"):
             return "https:" + path
@@ -297,15 +339,6 @@ class DetailPage(QWidget):
             return "https://anilibria.tv" + path
         return path
 
-    def handle_image_response(self, reply):
-        if reply.error() == QNetworkReply.NoError:
-            pixmap = QPixmap()
-            pixmap.loadFromData(reply.readAll())
-            self.set_poster_pixmap(pixmap)
-        else:
-            self.set_default_image()
-        reply.deleteLater()
-
     def set_poster_pixmap(self, pixmap):
         if pixmap.isNull():
             self.set_default_image()
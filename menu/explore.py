@@ -3,15 +3,25 @@ from PySide6.QtWidgets import (
     QLabel, QGraphicsView, QScrollArea, QLineEdit, QPushButton, QGraphicsScene,
     QGraphicsPixmapItem, QComboBox, QFrame
 )
-from PySide6.QtGui import QPixmap, QPainter, QPainterPath, QColor
-from PySide6.QtCore import Qt, QRectF, QUrl, Signal
-from PySide6.QtNetwork import QNetworkAccessManager, QNetworkRequest, QNetworkReply
+from PySide6.QtGui import QPixmap, QImage, QPainter, QPainterPath, QColor
+from PySide6.QtCore import Qt, QRectF, Signal, QTimer, QPoint, QRect
 import json
 import os
 import random
 import requests
 from pathlib import Path
 
+from script.catalog import catalog
+from script.poster_fetcher import poster_fetcher
+from script.render_cache import render_cache
+from script.preview import preview_key, preview_pixmap
+from script.scheduler import VISIBLE, PREFETCH
+
+
+CARD_SIZE = (240, 360)
+CARD_RADIUS = 15
+PLACEHOLDER_KEY = ("placeholder", "Loading...")
+
 
 class RoundedImageLabel(QGraphicsView):
     def __init__(self, parent=None):
@@ -24,28 +34,37 @@ class RoundedImageLabel(QGraphicsView):
         self.set_placeholder()
 
     def set_image(self, image_path):
+        """image_path is a local path or a QImage/QPixmap (e.g. from the poster cache)"""
         # Clear existing items
         self.scene.clear()
 
-        pixmap = self.load_pixmap(image_path)
-        if pixmap.isNull():
-            pixmap = self.create_placeholder()
-
-        pixmap = pixmap.scaled(240, 360, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
-
-        # Create mask for rounded corners
-        mask = QPixmap(240, 360)
-        mask.fill(Qt.transparent)
-        painter = QPainter(mask)
-        painter.setRenderHint(QPainter.Antialiasing)
-        painter.setBrush(Qt.white)
-        painter.drawRoundedRect(0, 0, 240, 360, 15, 15)
-        painter.end()
-
-        # Apply mask
-        pixmap.setMask(mask.createMaskFromColor(Qt.transparent))
-
-        self.scene.addItem(QGraphicsPixmapItem(pixmap))
+        if isinstance(image_path, (QPixmap, QImage)):
+            # cacheKey is stable while the poster cache holds the same image
+            source, key = image_path, ("image", image_path.cacheKey())
+        else:
+            # Local files and the placeholder are rendered once and reused
+            key = ("file", image_path) if image_path else PLACEHOLDER_KEY
+            source = None
+            if render_cache.get(key, CARD_SIZE, CARD_RADIUS) is None:
+                source = self.load_pixmap(image_path)
+        if source is not None and source.isNull():
+            source, key = self.create_placeholder(), PLACEHOLDER_KEY
+
+        thumbnail = render_cache.thumbnail(key, source, CARD_SIZE, CARD_RADIUS)
+        self.scene.addItem(QGraphicsPixmapItem(thumbnail))
+
+    def set_preview(self, item):
+        """Paint the title's stored preview instead of the flat placeholder, if it has one"""
+        key = preview_key(item)
+        if key is None:
+            return
+        source = None
+        if render_cache.get(key, CARD_SIZE, CARD_RADIUS) is None:
+            source = preview_pixmap(item, CARD_SIZE)
+            if source is None:
+                return
+        self.scene.clear()
+        self.scene.addItem(QGraphicsPixmapItem(render_cache.thumbnail(key, source, CARD_SIZE, CARD_RADIUS)))
 
     def load_pixmap(self, image_path):
         # Handle relative paths
@@ -85,6 +104,7 @@ class AnimeCard(QFrame):
         super().__init__(parent)
         self.data = data
         self.main_window = main_window
+        self.poster_request = None
         self.setup_ui()
         self.setCursor(Qt.PointingHandCursor)
 
@@ -97,15 +117,8 @@ class AnimeCard(QFrame):
             border: none;
         """)
 
-        # Create rounded mask
-        mask = QPixmap(240, 360)
-        mask.fill(Qt.transparent)
-        painter = QPainter(mask)
-        painter.setRenderHint(QPainter.Antialiasing)
-        painter.setBrush(Qt.white)
-        painter.drawRoundedRect(0, 0, 240, 360, 15, 15)
-        painter.end()
-        self.setMask(mask.mask())
+        # Rounded mask, shared by every card
+        self.setMask(render_cache.widget_mask(CARD_SIZE, 15))
 
         container = QWidget(self)
         container.setGeometry(0, 0, 240, 360)
@@ -125,8 +138,9 @@ class AnimeCard(QFrame):
         """)
         grid.addWidget(self.genre_label, 0, 0)
 
-        # Image placeholder
+        # Image placeholder, or the poster's preview when the catalog has one
         self.rounded_image = RoundedImageLabel()
+        self.rounded_image.set_preview(self.data)
         grid.addWidget(self.rounded_image, 0, 0)
 
         title = self.data.get("title", "Назва відсутня")
@@ -143,9 +157,26 @@ class AnimeCard(QFrame):
         """)
         grid.addWidget(self.text_label, 0, 0)
 
-    def update_image(self, pixmap):
-        self.rounded_image.set_image("")
-        self.rounded_image.set_image(pixmap)
+    def load_poster(self, image_url, priority=VISIBLE):
+        # Cache, single-flight download and decoding are handled by the shared fetcher
+        self.release()
+        self.poster_request = poster_fetcher.fetch(image_url, CARD_SIZE, self.update_image, owner=self,
+                                                   priority=priority)
+
+    def raise_priority(self, priority):
+        if self.poster_request is not None:
+            poster_fetcher.raise_priority(self.poster_request, priority)
+
+    def release(self):
+        """Stop waiting for the poster; the download is aborted if no other card needs it"""
+        if self.poster_request is not None:
+            poster_fetcher.cancel(self.poster_request)
+            self.poster_request = None
+
+    def update_image(self, image):
+        if image is None:
+            return  # nothing could be loaded, keep the placeholder
+        self.rounded_image.set_image(image)
 
     def mousePressEvent(self, event):
         self.main_window.show_anime_details(self.data)
@@ -155,9 +186,15 @@ class ExplorePage(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.main_window = parent
-        self.network_manager = QNetworkAccessManager(self)
         self.current_data = []
         self.all_anime_data = []
+        self.use_catalog = False
+        # Cards whose poster has not been requested yet
+        self.waiting_cards = []
+        # One visibility pass per batch of new cards, once the event loop has placed them
+        self.schedule_timer = QTimer(self)
+        self.schedule_timer.setSingleShot(True)
+        self.schedule_timer.setInterval(0)
         self.init_ui()
         self.connect_signals()
         self.load_initial_data()
@@ -292,18 +329,21 @@ class ExplorePage(QWidget):
         main_layout.addLayout(control_panel)
 
         # Cards Area
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setStyleSheet("background: transparent; border: none;")
+        self.scroll_area = QScrollArea()
+        self.scroll_area.setWidgetResizable(True)
+        self.scroll_area.setStyleSheet("background: transparent; border: none;")
         self.content = QWidget()
         self.content.setStyleSheet("background: transparent;")
         self.grid = QGridLayout(self.content)
         self.grid.setContentsMargins(0, 0, 0, 0)
         self.grid.setSpacing(25)
-        scroll_area.setWidget(self.content)
-        main_layout.addWidget(scroll_area)
+        self.scroll_area.setWidget(self.content)
+        main_layout.addWidget(self.scroll_area)
 
     def connect_signals(self):
+        # Posters of cards scrolled into view move up to the visible class
+        self.scroll_area.verticalScrollBar().valueChanged.connect(self.schedule_images)
+        self.schedule_timer.timeout.connect(self.schedule_images)
         self.top_btn.clicked.connect(self.show_top)
         self.random_btn.clicked.connect(self.show_random)
         self.best_by_genre_btn.clicked.connect(self.show_best_by_genre)
@@ -315,6 +355,13 @@ class ExplorePage(QWidget):
     def load_initial_data(self):
         file_path = Path("data/online/random.json")
         try:
+            if catalog.count() > 0:
+                self.use_catalog = True
+                data = catalog.query(list_name="random", limit=12) or catalog.query(limit=12)
+                self.all_anime_data = data
+                self.create_anime_cards(data)
+                return
+
             os.makedirs("data/online", exist_ok=True)
 
             if not file_path.exists() or file_path.stat().st_size == 0:
@@ -336,11 +383,7 @@ class ExplorePage(QWidget):
             self.load_demo_data()
 
     def create_anime_cards(self, anime_list):
-        # Clear existing widgets
-        while self.grid.count():
-            item = self.grid.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
+        self.clear_cards()
 
         # Create new cards
         for i, item in enumerate(anime_list[:12]):
@@ -352,17 +395,61 @@ class ExplorePage(QWidget):
             if "image" in item and item["image"].startswith("http"):
                 self.load_image_async(item["image"], card)
 
-    def load_image_async(self, image_url, card):
-        request = QNetworkRequest(QUrl(image_url))
-        reply = self.network_manager.get(request)
-        reply.finished.connect(lambda: self.handle_image_response(reply, card))
+    def clear_cards(self):
+        # Old cards stop their downloads before they are deleted
+        self.waiting_cards = []
+        while self.grid.count():
+            item = self.grid.takeAt(0)
+            if item.widget():
+                item.widget().release()
+                item.widget().deleteLater()
 
-    def handle_image_response(self, reply, card):
-        if reply.error() == QNetworkReply.NoError:
-            pixmap = QPixmap()
-            pixmap.loadFromData(reply.readAll())
-            card.update_image(pixmap)
-        reply.deleteLater()
+    def show_prefetched(self, entries):
+        """Show (item, QImage) pairs from the random pool without touching the network"""
+        self.create_anime_cards([])
+        for i, (item, image) in enumerate(entries[:12]):
+            card = AnimeCard(self, item, self.main_window)
+            self.grid.addWidget(card, i // 4, i % 4)
+            if image is not None and not image.isNull():
+                card.update_image(image)
+            elif "image" in item and item["image"].startswith("http"):
+                self.load_image_async(item["image"], card)
+
+    def add_anime_card(self, item):
+        """Append a single card to the grid (used while results are still streaming in)"""
+        i = self.grid.count()
+        if i >= 12:
+            return
+        card = AnimeCard(self, item, self.main_window)
+        self.grid.addWidget(card, i // 4, i % 4)
+
+        if "image" in item and item["image"].startswith("http"):
+            self.load_image_async(item["image"], card)
+
+    def load_image_async(self, image_url, card):
+        # Started once the layout has placed the card, so visibility is known
+        self.waiting_cards.append((card, image_url))
+        self.schedule_timer.start()
+
+    def is_card_visible(self, card):
+        viewport = self.scroll_area.viewport()
+        top_left = card.mapTo(viewport, QPoint(0, 0))
+        return self.isVisible() and viewport.rect().intersects(QRect(top_left, card.size()))
+
+    def schedule_images(self):
+        """Request new posters as visible or prefetch, and raise the ones scrolled into view"""
+        # The layout shows new cards lazily; show them now so activate() places them
+        for card, _ in self.waiting_cards:
+            card.show()
+        self.grid.activate()
+        waiting, self.waiting_cards = self.waiting_cards, []
+        for card, image_url in waiting:
+            card.load_poster(image_url, VISIBLE if self.is_card_visible(card) else PREFETCH)
+
+        for i in range(self.grid.count()):
+            card = self.grid.itemAt(i).widget()
+            if card is not None and self.is_card_visible(card):
+                card.raise_priority(VISIBLE)
 
     def load_demo_data(self):
         demo_data = [
@@ -398,18 +485,10 @@ class ExplorePage(QWidget):
     def show_best_by_genre(self):
         selected_genre = self.genre_combo.currentText()
         if selected_genre == "Усі жанри":
-            sorted_data = sorted(self.all_anime_data,
-                                 key=lambda x: self.get_rating_value(x),
-                                 reverse=True)
-            self.create_anime_cards(sorted_data[:12])
+            self.create_anime_cards(self.find_anime(order_by_rating=True))
             return
 
-        filtered_data = [anime for anime in self.all_anime_data
-                         if selected_genre.lower() in anime.get("genre", "").lower()]
-        sorted_data = sorted(filtered_data,
-                             key=lambda x: self.get_rating_value(x),
-                             reverse=True)
-        self.create_anime_cards(sorted_data[:12])
+        self.create_anime_cards(self.find_anime(genre=selected_genre, order_by_rating=True))
 
     def get_rating_value(self, anime):
         rating = anime.get("rating", 0)
@@ -420,45 +499,47 @@ class ExplorePage(QWidget):
         except (TypeError, ValueError):
             return 0
 
+    def find_anime(self, search=None, genre=None, order_by_rating=False, offset=0, limit=12):
+        """Query the catalog when it has data, otherwise filter the in-memory (demo) list"""
+        if self.use_catalog:
+            return catalog.query(search=search, genre=genre, order_by_rating=order_by_rating,
+                                 limit=limit, offset=offset)
+
+        data = self.all_anime_data
+        if genre:
+            data = [anime for anime in data
+                    if genre.lower() in anime.get("genre", "").lower()]
+        if search:
+            data = [anime for anime in data
+                    if (search in anime.get("title", "").lower() or
+                        search in anime.get("genre", "").lower())]
+        if order_by_rating:
+            data = sorted(data, key=lambda x: self.get_rating_value(x), reverse=True)
+        return data[offset:offset + limit]
+
     def search_anime(self):
         search_text = self.search_field.text().lower().strip()
         if not search_text:
             self.create_anime_cards(self.all_anime_data[:12])
             return
 
-        filtered_data = [
-            anime for anime in self.all_anime_data
-            if (search_text in anime.get("title", "").lower() or
-                search_text in anime.get("genre", "").lower())
-        ]
-        self.create_anime_cards(filtered_data[:12])
+        self.create_anime_cards(self.find_anime(search=search_text))
 
     def filter_anime(self):
         selected_genre = self.genre_combo.currentText()
         selected_category = self.category_combo.currentText()
 
-        filtered_data = self.all_anime_data
-
-        if selected_genre != "Усі жанри":
-            filtered_data = [anime for anime in filtered_data
-                             if selected_genre.lower() in anime.get("genre", "").lower()]
-
-        if selected_category != "Усі категорії":
-            if selected_category == "Топ тижня":
-                filtered_data = sorted(filtered_data,
-                                       key=lambda x: self.get_rating_value(x),
-                                       reverse=True)
-            elif selected_category == "Популярні":
-                filtered_data = sorted(filtered_data,
-                                       key=lambda x: self.get_rating_value(x),
-                                       reverse=True)
-            elif selected_category == "Нові релізи":
-                filtered_data = filtered_data[:8]
-            elif selected_category == "Класика":
-                filtered_data = filtered_data[4:12]
-            elif selected_category == "Онгоінги":
-                filtered_data = filtered_data[:6]
-            elif selected_category == "Завершені":
-                filtered_data = filtered_data[6:12]
-
-        self.create_anime_cards(filtered_data[:12])
\ No newline at end of file
+        genre = selected_genre if selected_genre != "Усі жанри" else None
+        # category -> (order by rating, offset, limit)
+        categories = {
+            "Топ тижня": (True, 0, 12),
+            "Популярні": (True, 0, 12),
+            "Нові релізи": (False, 0, 8),
+            "Класика": (False, 4, 8),
+            "Онгоінги": (False, 0, 6),
+            "Завершені": (False, 6, 6),
+        }
+        order_by_rating, offset, limit = categories.get(selected_category, (False, 0, 12))
+
+        self.create_anime_cards(self.find_anime(genre=genre, order_by_rating=order_by_rating,
+                                                offset=offset, limit=limit))
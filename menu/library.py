@@ -3,9 +3,11 @@ from PySide6.QtWidgets import (
     QLineEdit, QLabel, QGraphicsView, QGraphicsScene,
     QGraphicsPixmapItem, QGridLayout, QFrame
 )
-from PySide6.QtGui import QPixmap, QPainter
+from PySide6.QtGui import QPixmap
 from PySide6.QtCore import Qt
 
+from script.render_cache import render_cache
+
 
 class RoundedImageLabel(QGraphicsView):
     def __init__(self, image_path, radius=20, parent=None):
@@ -13,22 +15,12 @@ class RoundedImageLabel(QGraphicsView):
         self.setStyleSheet("border: none; background: transparent;")
         self.setFixedSize(240, 360)
 
-        pixmap = QPixmap(image_path).scaled(
-            240, 360,
-            Qt.AspectRatioMode.KeepAspectRatioByExpanding,
-            Qt.TransformationMode.SmoothTransformation
-        )
-
-        mask = QPixmap(pixmap.size())
-        mask.fill(Qt.GlobalColor.transparent)
-
-        painter = QPainter(mask)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        painter.setBrush(Qt.GlobalColor.white)
-        painter.drawRoundedRect(0, 0, pixmap.width(), pixmap.height(), radius, radius)
-        painter.end()
-
-        pixmap.setMask(mask.createMaskFromColor(Qt.GlobalColor.transparent))
+        # Rendered once per file and size, repeat visits reuse the finished thumbnail
+        key = ("file", image_path)
+        aspect = Qt.AspectRatioMode.KeepAspectRatioByExpanding
+        pixmap = render_cache.get(key, (240, 360), radius, aspect=aspect)
+        if pixmap is None:
+            pixmap = render_cache.thumbnail(key, QPixmap(image_path), (240, 360), radius, aspect=aspect)
 
         scene = QGraphicsScene()
         scene.addItem(QGraphicsPixmapItem(pixmap))
@@ -4,80 +4,106 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtGui import QPixmap, QPainter, QColor
 from PySide6.QtCore import Qt
-import json
 import os
-import requests
 from pathlib import Path
 
+from script.poster_fetcher import poster_fetcher
+from script.render_cache import render_cache
+from script.preview import preview_key, preview_pixmap
+from script.catalog import catalog
+from script.snapshot import read_page
+
+
+CARD_SIZE = (240, 360)
+
 
 class RoundedImageLabel(QGraphicsView):
-    def __init__(self, image_path, radius, parent=None):
+    def __init__(self, image_path, radius, item=None, parent=None):
         super().__init__(parent)
         self.setStyleSheet("border: none; background: transparent; padding: 0; margin: 0;")
         self.setFixedSize(240, 360)
+        self.radius = radius
+        self.scene = QGraphicsScene()
+        self.setScene(self.scene)
+        self.setAlignment(Qt.AlignCenter)
+        self.item = item
 
-        pixmap = self.load_pixmap(image_path)
-        pixmap = pixmap.scaled(240, 360, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
-
-        # Create mask for rounded corners
-        mask = QPixmap(240, 360)
-        mask.fill(Qt.transparent)
-        painter = QPainter(mask)
-        painter.setRenderHint(QPainter.Antialiasing)
-        painter.setBrush(Qt.white)
-        painter.drawRoundedRect(0, 0, 240, 360, radius, radius)
-        painter.end()
-
-        # Apply mask1
-        pixmap.setMask(mask.createMaskFromColor(Qt.transparent))
+        # Network posters are fetched by the page later; until then show the
+        # stored preview or the placeholder
+        self.show_path(image_path)
 
-        scene = QGraphicsScene()
-        scene.addItem(QGraphicsPixmapItem(pixmap))
-        self.setScene(scene)
-        self.setAlignment(Qt.AlignCenter)
+    def show_path(self, image_path):
+        if remote_image_url(image_path):
+            key = preview_key(self.item) or ("placeholder", "Loading...")
+        elif image_path and isinstance(image_path, str):
+            key = ("file", image_path)
+        else:
+            key = ("placeholder", "Image\nNot Found")
+
+        # Rendered once per path, later cards skip loading the file at all
+        thumbnail = render_cache.get(key, CARD_SIZE, self.radius)
+        if thumbnail is None:
+            pixmap = preview_pixmap(self.item, CARD_SIZE) if key[0] == "preview" else None
+            if pixmap is None:
+                if key[0] == "preview":
+                    key = ("placeholder", "Loading...")  # unreadable preview
+                pixmap = self.load_pixmap(image_path)
+            if pixmap.isNull():
+                pixmap, key = self.create_placeholder("Image\nNot Found"), ("placeholder", "Image\nNot Found")
+            thumbnail = render_cache.thumbnail(key, pixmap, CARD_SIZE, self.radius)
+        self.scene.clear()
+        self.scene.addItem(QGraphicsPixmapItem(thumbnail))
+
+    def set_image(self, image):
+        """Show a downloaded poster (QImage/QPixmap); None shows the "not found" placeholder"""
+        if image is None or image.isNull():
+            self.show_path(None)
+            return
+
+        # cacheKey is stable while the poster cache holds the same image
+        thumbnail = render_cache.thumbnail(("image", image.cacheKey()), image, CARD_SIZE, self.radius)
+        self.scene.clear()
+        self.scene.addItem(QGraphicsPixmapItem(thumbnail))
 
     def load_pixmap(self, image_path):
         # Handle relative paths
         if not image_path or not isinstance(image_path, str):
-            return self.create_placeholder()
-
-        # Fix relative URLs
-        if image_path.startswith("//"):
-            image_url = "https:" + image_path
-        elif image_path.startswith("/") and not image_path.startswith("//"):
-            image_url = "https://anilibria.tv" + image_path
-        elif image_path.startswith("http"):
-            image_url = image_path
-        else:
-            # Try local file
-            base_dir = Path(__file__).parent.parent
-            local_path = base_dir / image_path
-            if local_path.exists():
-                return QPixmap(str(local_path))
-            return self.create_placeholder()
+            return self.create_placeholder("Image\nNot Found")
 
-        try:
-            response = requests.get(image_url, timeout=10)
-            response.raise_for_status()
-            pixmap = QPixmap()
-            pixmap.loadFromData(response.content)
-            if pixmap.isNull():
-                return self.create_placeholder()
-            return pixmap
-        except Exception as e:
-            print(f"Помилка завантаження зображення: {e}")
-            return self.create_placeholder()
+        if remote_image_url(image_path):
+            return self.create_placeholder("Loading...")
+
+        # Try local file
+        base_dir = Path(__file__).parent.parent
+        local_path = base_dir / image_path
+        if local_path.exists():
+            return QPixmap(str(local_path))
+        return self.create_placeholder("Image\nNot Found")
 
-    def create_placeholder(self):
+    def create_placeholder(self, text):
         pixmap = QPixmap(240, 360)
         pixmap.fill(QColor(60, 60, 80))
         painter = QPainter(pixmap)
         painter.setPen(QColor(200, 200, 255))
-        painter.drawText(pixmap.rect(), Qt.AlignCenter, "Image\nNot Found")
+        painter.drawText(pixmap.rect(), Qt.AlignCenter, text)
         painter.end()
         return pixmap
 
 
+def remote_image_url(image_path):
+    """Absolute URL for a network poster, None for local files"""
+    if not image_path or not isinstance(image_path, str):
+        return None
+    # Fix relative URLs
+    if image_path.startswith("//"):
+        return "https:" + image_path
+    if image_path.startswith("/"):
+        return "https://anilibria.tv" + image_path
+    if image_path.startswith("http"):
+        return image_path
+    return None
+
+
 class AnimeCard(QFrame):
     def __init__(self, parent, data, main_window):
         super().__init__(parent)
@@ -95,15 +121,8 @@ class AnimeCard(QFrame):
             border: none;
         """)
 
-        # Create rounded mask
-        mask = QPixmap(240, 360)
-        mask.fill(Qt.transparent)
-        painter = QPainter(mask)
-        painter.setRenderHint(QPainter.Antialiasing)
-        painter.setBrush(Qt.white)
-        painter.drawRoundedRect(0, 0, 240, 360, 15, 15)
-        painter.end()
-        self.setMask(mask.mask())
+        # Rounded mask, shared by every card
+        self.setMask(render_cache.widget_mask(CARD_SIZE, 15))
 
         container = QWidget(self)
         container.setGeometry(0, 0, 240, 360)
@@ -115,8 +134,8 @@ class AnimeCard(QFrame):
         if "image" not in self.data:
             self.data["image"] = "default.jpg"
 
-        rounded_image = RoundedImageLabel(self.data.get("image", ""), radius=20)
-        grid.addWidget(rounded_image, 0, 0)
+        self.rounded_image = RoundedImageLabel(self.data.get("image", ""), radius=20, item=self.data)
+        grid.addWidget(self.rounded_image, 0, 0)
 
         title = self.data.get("title", "Назва відсутня")
         if len(title) > 23:
@@ -132,6 +151,9 @@ class AnimeCard(QFrame):
         """)
         grid.addWidget(text_label, 0, 0)
 
+    def update_image(self, image):
+        self.rounded_image.set_image(image)
+
     def mousePressEvent(self, event):
         self.main_window.show_anime_details(self.data)
 
@@ -142,6 +164,8 @@ class RecommendationPage(QWidget):
         self.parent = parent
         self.setStyleSheet("background: transparent;")
         self.anime_list = []
+        # Posters still loading for the cards on screen
+        self.pending_requests = []
 
         layout = QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 20)
@@ -191,43 +215,30 @@ class RecommendationPage(QWidget):
 
     def load_anime_data(self):
         # Clear existing widgets
-        for i in reversed(range(self.grid.count())):
-            widget = self.grid.itemAt(i).widget()
-            if widget:
-                widget.deleteLater()
+        self.clear_grid()
 
         file_path = "data/online/rec_anime.json"
         self.anime_list = []
 
         try:
+            # Only the rows the grid shows are read from the catalog
+            self.anime_list = catalog.query(list_name="top", limit=8)
+            if self.anime_list:
+                self.create_cards(self.anime_list)
+                return
+
+            # Older installs only have the JSON dump; read it through its mmap snapshot
             base_dir = Path(__file__).parent.parent
             full_path = base_dir / file_path
 
             if not full_path.exists():
                 raise FileNotFoundError("Data file not found")
+            if full_path.stat().st_size == 0:
+                raise ValueError("Empty data file")
 
-            with open(full_path, "r", encoding="utf-8") as f:
-                content = f.read()
-                if not content.strip():
-                    raise ValueError("Empty data file")
+            self.anime_list = read_page(full_path, limit=8)
 
-                self.anime_list = json.loads(content)
-                if not isinstance(self.anime_list, list):
-                    raise ValueError("Data is not a list")
-
-            # Create cards
-            for i, anime in enumerate(self.anime_list[:8]):
-                if not isinstance(anime, dict):
-                    continue
-
-                # Ensure required fields
-                if "image" not in anime:
-                    anime["image"] = "default.jpg"
-                if "title" not in anime:
-                    anime["title"] = "Unknown Title"
-
-                card = AnimeCard(self, anime, self.parent)
-                self.grid.addWidget(card, i // 4, i % 4)
+            self.create_cards(self.anime_list)
 
         except Exception as e:
             print(f"Помилка: {e}")
@@ -237,4 +248,44 @@ class RecommendationPage(QWidget):
                     "title": f"Placeholder {i + 1}",
                     "image": "default.jpg"
                 }, self.parent)
-                self.grid.addWidget(card, i // 4, i % 4)
\ No newline at end of file
+                self.grid.addWidget(card, i // 4, i % 4)
+
+    def show_first_page(self, anime_list):
+        """Render the first downloaded page while the loader keeps fetching the rest"""
+        self.clear_grid()
+        # Parsed items carry no preview; the catalog may have one from an earlier run
+        self.anime_list = catalog.merge_previews(list(anime_list))
+        self.create_cards(self.anime_list)
+
+    def clear_grid(self):
+        # Posters for cards about to be deleted are no longer needed
+        for request in self.pending_requests:
+            poster_fetcher.cancel(request)
+        self.pending_requests = []
+
+        while self.grid.count():
+            item = self.grid.takeAt(0)
+            if item.widget():
+                item.widget().deleteLater()
+
+    def create_cards(self, anime_list):
+        for i, anime in enumerate(anime_list[:8]):
+            if not isinstance(anime, dict):
+                continue
+
+            # Ensure required fields
+            if "image" not in anime:
+                anime["image"] = "default.jpg"
+            if "title" not in anime:
+                anime["title"] = "Unknown Title"
+
+            card = AnimeCard(self, anime, self.parent)
+            self.grid.addWidget(card, i // 4, i % 4)
+
+            image_url = remote_image_url(anime["image"])
+            if image_url:
+                self.load_image_async(image_url, card)
+
+    def load_image_async(self, image_url, card):
+        # Cache, single-flight download and decoding are handled by the shared fetcher
+        self.pending_requests.append(poster_fetcher.fetch(image_url, CARD_SIZE, card.update_image))
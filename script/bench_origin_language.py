@@ -0,0 +1,74 @@
+"""
+Micro-benchmark for origin-language detection on a synthetic set of titles.
+
+    python -m script.bench_origin_language [count]
+"""
+import sys
+import random
+import timeit
+
+from script.pars import detect_origin_language, detect_origin_languages
+
+
+def legacy_detect_origin_language(original_title):
+    # The generator-based version detect_origin_language replaced, kept as the reference
+    if not original_title:
+        return "Other", False
+
+    if any('\u4e00' <= ch <= '\u9fff' for ch in original_title):
+        return "Chinese", True
+
+    if any(
+        '\u3040' <= ch <= '\u309f' or
+        '\u30a0' <= ch <= '\u30ff' or
+        '\u4e00' <= ch <= '\u9fff'
+        for ch in original_title
+    ):
+        return "Japanese", False
+
+    return "Other", False
+
+
+def synthetic_titles(count, seed=42):
+    rng = random.Random(seed)
+    latin = "abcdefghijklmnopqrstuvwxyz ABCDEFGHIJ:-!"
+    kana = "あいうえおかきくけこさしすせそたちつてとカキクケコサシスセソー"
+    han = "進撃巨人天気鬼滅刃呪術廻戦魔道祖師天官賜福"
+    titles = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.45:
+            alphabet = latin
+        elif roll < 0.75:
+            alphabet = kana + latin[:5]
+        elif roll < 0.95:
+            alphabet = han + kana
+        else:
+            titles.append("")
+            continue
+        titles.append("".join(rng.choice(alphabet) for _ in range(rng.randint(4, 40))))
+    return titles
+
+
+def main(count=100_000):
+    titles = synthetic_titles(count)
+
+    expected = [legacy_detect_origin_language(t) for t in titles]
+    assert [detect_origin_language(t) for t in titles] == expected
+    assert detect_origin_languages(titles) == expected
+
+    runs = {
+        "legacy, per title": lambda: [legacy_detect_origin_language(t) for t in titles],
+        "regex, per title": lambda: [detect_origin_language(t) for t in titles],
+        "regex, batched": lambda: detect_origin_languages(titles),
+    }
+    baseline = None
+    print(f"{count} synthetic titles, best of 5")
+    for name, fn in runs.items():
+        best = min(timeit.repeat(fn, number=1, repeat=5))
+        baseline = baseline or best
+        print(f"  {name:<20} {best * 1000:8.1f} ms  x{baseline / best:.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,355 @@
+import json
+import time
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent
+CATALOG_FILE = BASE_DIR / "data" / "online" / "catalog.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS titles (
+    key            TEXT PRIMARY KEY,
+    id             INTEGER,
+    code           TEXT,
+    title          TEXT,
+    title_ru       TEXT,
+    title_original TEXT,
+    origin_lang    TEXT,
+    is_donghua     INTEGER,
+    image          TEXT,
+    image_original TEXT,
+    genre          TEXT,
+    status         TEXT,
+    description    TEXT,
+    description_ru TEXT,
+    rating         REAL,
+    episodes       TEXT,
+    search_text    TEXT,
+    updated        INTEGER,
+    preview_color  TEXT,
+    preview        TEXT,
+    fetched_at     REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS title_genres (
+    key   TEXT NOT NULL REFERENCES titles(key) ON DELETE CASCADE,
+    genre TEXT NOT NULL,
+    PRIMARY KEY (key, genre)
+);
+CREATE TABLE IF NOT EXISTS lists (
+    name     TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    key      TEXT NOT NULL REFERENCES titles(key) ON DELETE CASCADE,
+    PRIMARY KEY (name, position)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    name  TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_titles_rating ON titles(rating DESC);
+CREATE INDEX IF NOT EXISTS idx_titles_status ON titles(status);
+CREATE INDEX IF NOT EXISTS idx_title_genres_genre ON title_genres(genre, key);
+CREATE INDEX IF NOT EXISTS idx_lists_key ON lists(key);
+CREATE INDEX IF NOT EXISTS idx_titles_image ON titles(image);
+"""
+
+# Columns added after the first release; created on databases that predate them
+MIGRATIONS = {
+    "updated": "ALTER TABLE titles ADD COLUMN updated INTEGER",
+    "image_original": "ALTER TABLE titles ADD COLUMN image_original TEXT",
+    "preview_color": "ALTER TABLE titles ADD COLUMN preview_color TEXT",
+    "preview": "ALTER TABLE titles ADD COLUMN preview TEXT",
+}
+
+COLUMNS = ("key", "id", "code", "title", "title_ru", "title_original", "origin_lang", "is_donghua",
+           "image", "image_original", "genre", "status", "description", "description_ru", "rating", "episodes", "updated",
+           "preview_color", "preview", "fetched_at")
+
+
+def item_key(item):
+    """Stable catalog key: API id, then code, then title"""
+    if item.get("id") is not None:
+        return str(item["id"])
+    return item.get("code") or item.get("title") or ""
+
+
+def split_genres(genre_str):
+    if not genre_str or genre_str == "Жанр не вказано":
+        return []
+    return [g.strip().lower() for g in genre_str.replace("/", ",").split(",") if g.strip()]
+
+
+class Catalog:
+    """Local title catalog in SQLite (WAL mode), one connection per thread."""
+
+    def __init__(self, path=CATALOG_FILE):
+        self.path = Path(path)
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            # SQLite's lower() only folds ASCII, Cyrillic titles need Python's
+            conn.create_function("py_lower", 1, lambda v: v.lower() if isinstance(v, str) else v,
+                                 deterministic=True)
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(SCHEMA)
+                    self.migrate(conn)
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def migrate(self, conn):
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(titles)")}
+        for column, statement in MIGRATIONS.items():
+            if column not in existing:
+                conn.execute(statement)
+        conn.commit()
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def item_to_row(self, item):
+        rating = item.get("rating")
+        if not isinstance(rating, (int, float)):
+            try:
+                rating = float(rating)
+            except (TypeError, ValueError):
+                rating = None
+
+        episodes = item.get("episodes")
+        return {
+            "key": item_key(item),
+            "id": item.get("id"),
+            "code": item.get("code"),
+            "title": item.get("title"),
+            "title_ru": item.get("title_ru"),
+            "title_original": item.get("title_original"),
+            "origin_lang": item.get("origin_lang"),
+            "is_donghua": int(bool(item["is_donghua"])) if "is_donghua" in item else None,
+            "image": item.get("image"),
+            "image_original": item.get("image_original"),
+            "genre": item.get("genre"),
+            "status": item.get("status"),
+            "description": item.get("description"),
+            "description_ru": item.get("description_ru"),
+            "rating": rating,
+            "episodes": json.dumps(episodes, ensure_ascii=False) if episodes is not None else None,
+            "updated": item.get("updated"),
+            # Tiny poster preview (script/preview.py), kept when the item does not carry one
+            "preview_color": item.get("preview_color"),
+            "preview": item.get("preview"),
+            "fetched_at": time.time(),
+        }
+
+    def row_to_item(self, row):
+        item = {k: row[k] for k in row.keys() if row[k] is not None}
+        item.pop("key", None)
+        item.pop("search_text", None)
+        item.pop("updated", None)
+        item.pop("fetched_at", None)
+        item.setdefault("title", "Без назви")
+        item["is_donghua"] = bool(row["is_donghua"])
+        item["rating"] = row["rating"] if row["rating"] is not None else "Н/Д"
+        if row["episodes"] is not None:
+            item["episodes"] = json.loads(row["episodes"])
+        return item
+
+    def upsert(self, items, list_name=None, start_position=0):
+        """
+        Insert or update titles. Fields missing from an item keep their stored value.
+        With list_name the items are also placed into that list from start_position on.
+        """
+        rows = [self.item_to_row(item) for item in items if isinstance(item, dict)]
+        rows = [row for row in rows if row["key"]]
+        if not rows:
+            return 0
+
+        placeholders = ", ".join(f":{c}" for c in COLUMNS)
+        updates = ", ".join(f"{c} = COALESCE(excluded.{c}, {c})" for c in COLUMNS if c != "key")
+        try:
+            conn = self.connection()
+            with conn:
+                conn.executemany(
+                    f"INSERT INTO titles ({', '.join(COLUMNS)}) VALUES ({placeholders}) "
+                    f"ON CONFLICT(key) DO UPDATE SET {updates}",
+                    rows
+                )
+                conn.executemany(
+                    "UPDATE titles SET search_text = py_lower("
+                    "COALESCE(title, '') || ' ' || COALESCE(title_original, '') || ' ' || COALESCE(genre, '')) "
+                    "WHERE key = ?",
+                    [(row["key"],) for row in rows]
+                )
+                for row in rows:
+                    if row["genre"] is None:
+                        continue
+                    conn.execute("DELETE FROM title_genres WHERE key = ?", (row["key"],))
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO title_genres (key, genre) VALUES (?, ?)",
+                        [(row["key"], g) for g in split_genres(row["genre"])]
+                    )
+                if list_name:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO lists (name, position, key) VALUES (?, ?, ?)",
+                        [(list_name, start_position + i, row["key"]) for i, row in enumerate(rows)]
+                    )
+        except sqlite3.Error as e:
+            logging.error(f"Catalog upsert failed: {e}")
+            return 0
+        return len(rows)
+
+    def clear_list(self, list_name, from_position=0):
+        try:
+            conn = self.connection()
+            with conn:
+                conn.execute("DELETE FROM lists WHERE name = ? AND position >= ?", (list_name, from_position))
+        except sqlite3.Error as e:
+            logging.error(f"Catalog clear_list failed: {e}")
+
+    def query(self, list_name=None, search=None, genre=None, order_by_rating=False, limit=12, offset=0):
+        """Return only the rows a page is going to display."""
+        sql = ["SELECT t.* FROM titles t"]
+        where = []
+        args = []
+
+        if list_name:
+            sql.append("JOIN lists l ON l.key = t.key AND l.name = ?")
+            args.append(list_name)
+        if genre:
+            where.append("t.key IN (SELECT key FROM title_genres WHERE genre = ?)")
+            args.append(genre.strip().lower())
+        if search:
+            where.append("t.search_text LIKE ?")
+            args.append(f"%{search.strip().lower()}%")
+
+        if where:
+            sql.append("WHERE " + " AND ".join(where))
+
+        if order_by_rating:
+            sql.append("ORDER BY t.rating IS NULL, t.rating DESC")
+        elif list_name:
+            sql.append("ORDER BY l.position")
+        else:
+            sql.append("ORDER BY t.fetched_at DESC")
+
+        sql.append("LIMIT ? OFFSET ?")
+        args.extend([limit, offset])
+
+        try:
+            rows = self.connection().execute(" ".join(sql), args).fetchall()
+        except sqlite3.Error as e:
+            logging.error(f"Catalog query failed: {e}")
+            return []
+        return [self.row_to_item(row) for row in rows]
+
+    def get(self, key):
+        row = self.connection().execute("SELECT * FROM titles WHERE key = ?", (str(key),)).fetchone()
+        return self.row_to_item(row) if row else None
+
+    def set_episodes(self, key, episodes):
+        """
+        Store a lazily loaded playlist on an existing title. Unlike upsert it neither
+        creates a row nor touches fetched_at, so list order stays as it was.
+        """
+        try:
+            conn = self.connection()
+            with conn:
+                conn.execute("UPDATE titles SET episodes = ? WHERE key = ?",
+                             (json.dumps(episodes, ensure_ascii=False), str(key)))
+        except sqlite3.Error as e:
+            logging.error(f"Catalog set_episodes failed: {e}")
+
+    def set_preview(self, image_url, color, preview):
+        """Save the poster preview for every title whose grid poster is image_url"""
+        try:
+            conn = self.connection()
+            with conn:
+                conn.execute("UPDATE titles SET preview_color = ?, preview = ? WHERE image = ?",
+                             (color, preview, image_url))
+        except sqlite3.Error as e:
+            logging.error(f"Catalog set_preview failed: {e}")
+
+    def needs_preview(self, image_url):
+        """True when a title whose grid poster is image_url has no stored preview yet"""
+        try:
+            row = self.connection().execute(
+                "SELECT 1 FROM titles WHERE image = ? AND preview IS NULL LIMIT 1", (image_url,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logging.error(f"Catalog needs_preview failed: {e}")
+            return False
+        return row is not None
+
+    def merge_previews(self, items):
+        """Copy stored poster previews into items fresh from the API, which have none"""
+        missing = {item_key(item): item for item in items
+                   if isinstance(item, dict) and not item.get("preview") and item_key(item)}
+        if not missing:
+            return items
+        marks = ", ".join("?" for _ in missing)
+        try:
+            rows = self.connection().execute(
+                f"SELECT key, preview_color, preview FROM titles WHERE key IN ({marks}) "
+                "AND (preview IS NOT NULL OR preview_color IS NOT NULL)",
+                list(missing)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logging.error(f"Catalog merge_previews failed: {e}")
+            return items
+        for row in rows:
+            item = missing[row["key"]]
+            for field in ("preview_color", "preview"):
+                if row[field] is not None:
+                    item[field] = row[field]
+        return items
+
+    def get_state(self, name, default=None):
+        try:
+            row = self.connection().execute("SELECT value FROM sync_state WHERE name = ?", (name,)).fetchone()
+        except sqlite3.Error as e:
+            logging.error(f"Catalog get_state failed: {e}")
+            return default
+        return row[0] if row else default
+
+    def set_state(self, name, value):
+        try:
+            conn = self.connection()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO sync_state (name, value) VALUES (?, ?)", (name, str(value)))
+        except sqlite3.Error as e:
+            logging.error(f"Catalog set_state failed: {e}")
+
+    def latest_update(self):
+        """Newest API 'updated' timestamp stored in the catalog, or None"""
+        try:
+            return self.connection().execute("SELECT MAX(updated) FROM titles").fetchone()[0]
+        except sqlite3.Error as e:
+            logging.error(f"Catalog latest_update failed: {e}")
+            return None
+
+    def count(self, list_name=None):
+        try:
+            conn = self.connection()
+            if list_name:
+                return conn.execute("SELECT COUNT(*) FROM lists WHERE name = ?", (list_name,)).fetchone()[0]
+            return conn.execute("SELECT COUNT(*) FROM titles").fetchone()[0]
+        except sqlite3.Error as e:
+            logging.error(f"Catalog count failed: {e}")
+            return 0
+
+
+catalog = Catalog()
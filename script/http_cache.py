@@ -0,0 +1,153 @@
+import json
+import time
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+
+from script.http_client import http
+
+BASE_DIR = Path(__file__).parent.parent
+CACHE_DIR = BASE_DIR / "data" / "cache" / "http"
+
+# Seconds a stored response is served without asking the server at all.
+# After that it is revalidated with If-None-Match / If-Modified-Since.
+ENDPOINT_TTL = {
+    "title/updates": 10 * 60,
+    "title/changes": 10 * 60,
+    "title/list": 60 * 60,
+    "title": 60 * 60,
+    "title/random": 0,
+}
+DEFAULT_TTL = 5 * 60
+
+
+def endpoint_of(url):
+    """'https://api.anilibria.tv/v3/title/updates' -> 'title/updates'"""
+    path = urlsplit(url).path.strip("/")
+    parts = path.split("/")
+    if parts and parts[0].startswith("v") and parts[0][1:].isdigit():
+        parts = parts[1:]
+    return "/".join(parts)
+
+
+class ResponseCache:
+    """
+    Persistent cache of parsed API responses keyed by URL + params, plus a variant
+    string naming everything else the parsed result depends on (parser version,
+    display settings), so a 304 never serves output of another parser.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, client=http, ttl=None):
+        self.cache_dir = Path(cache_dir)
+        self.client = client
+        self.ttl = dict(ENDPOINT_TTL, **(ttl or {}))
+        self._memory = {}
+        self._lock = threading.Lock()
+
+    def key(self, url, params=None, variant=None):
+        params = sorted((str(k), str(v)) for k, v in (params or {}).items())
+        raw = url + "?" + "&".join(f"{k}={v}" for k, v in params)
+        if variant:
+            raw += "#" + variant
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, url):
+        return self.ttl.get(endpoint_of(url), DEFAULT_TTL)
+
+    def load(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry is not None:
+            return entry
+
+        path = self.cache_dir / f"{key}.json"
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Broken cache entry {path.name}: {e}")
+            return None
+
+        with self._lock:
+            self._memory[key] = entry
+        return entry
+
+    def store(self, key, entry):
+        with self._lock:
+            self._memory[key] = entry
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self.cache_dir / f"{key}.json"
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            tmp_path.replace(path)
+        except OSError as e:
+            logging.error(f"Failed to write cache entry: {e}")
+
+    def invalidate(self, url, params=None, variant=None):
+        key = self.key(url, params, variant)
+        with self._lock:
+            self._memory.pop(key, None)
+        (self.cache_dir / f"{key}.json").unlink(missing_ok=True)
+
+    def fetch(self, url, params=None, headers=None, parse=None, ttl=None, timeout=None, variant=None):
+        """
+        Return the parsed result for url+params.
+        A fresh entry is returned without a request; a stale one is revalidated and
+        reused as is on 304. `parse` turns the decoded JSON into the stored result;
+        `variant` must change whenever parse would give a different result.
+        """
+        key = self.key(url, params, variant)
+        ttl = self.ttl_for(url) if ttl is None else ttl
+        entry = self.load(key)
+
+        if entry and ttl > 0 and time.time() - entry["stored_at"] < ttl:
+            return entry["result"]
+
+        request_headers = dict(headers or {})
+        if entry:
+            if entry.get("etag"):
+                request_headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                request_headers["If-Modified-Since"] = entry["last_modified"]
+
+        kwargs = {"params": params, "headers": request_headers}
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+
+        try:
+            response = self.client.get(url, **kwargs)
+        except requests.RequestException as e:
+            if entry:
+                logging.warning(f"{url}: {e}, serving cached copy")
+                return entry["result"]
+            raise
+
+        if response.status_code == 304 and entry:
+            entry["stored_at"] = time.time()
+            self.store(key, entry)
+            return entry["result"]
+
+        response.raise_for_status()
+        data = response.json()
+        result = parse(data) if parse else data
+
+        self.store(key, {
+            "url": url,
+            "params": params or {},
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "stored_at": time.time(),
+            "result": result,
+        })
+        return result
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,154 @@
+import random
+import threading
+import time
+import logging
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from script.throttle import throttle
+from script.log_setup import log_request
+from script.scheduler import scheduler, SchedulerStopped
+
+# Per-host connection settings. Hosts not listed here use DEFAULT_SETTINGS.
+DEFAULT_SETTINGS = {
+    "timeout": 10,      # seconds
+    "pool_size": 4,     # keep-alive connections kept per host
+    "retries": 2,       # extra attempts after the first one
+    "backoff": 0.5,     # base delay for exponential backoff (seconds)
+}
+
+HOST_SETTINGS = {
+    "api.anilibria.tv": {"timeout": 15, "pool_size": 8},
+    "anilibria.tv": {"timeout": 10, "pool_size": 8},
+    "cache.libria.fun": {"timeout": 10, "pool_size": 4},
+    "ufdub.com": {"timeout": 10, "pool_size": 4},
+    "video.ufdub.com": {"timeout": 10, "pool_size": 4},
+    "api.ufdub.com": {"timeout": 10, "pool_size": 4},
+}
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0',
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_METHODS = {"GET", "HEAD", "OPTIONS"}
+MAX_BACKOFF = 8
+
+
+class HttpClient:
+    """Shared HTTP client: one keep-alive Session per host, retries with jittered backoff."""
+
+    def __init__(self, host_settings=None, default_settings=None):
+        self.default_settings = dict(DEFAULT_SETTINGS, **(default_settings or {}))
+        self.host_settings = dict(HOST_SETTINGS)
+        if host_settings:
+            self.host_settings.update(host_settings)
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def settings_for(self, host):
+        return dict(self.default_settings, **self.host_settings.get(host, {}))
+
+    def configure_host(self, host, **settings):
+        """Change settings for a host. An existing session is rebuilt on next use."""
+        with self._lock:
+            self.host_settings[host] = dict(self.host_settings.get(host, {}), **settings)
+            session = self._sessions.pop(host, None)
+        if session:
+            session.close()
+
+    def session_for(self, host):
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                pool_size = self.settings_for(host)["pool_size"]
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+                session = requests.Session()
+                session.headers.update(DEFAULT_HEADERS)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[host] = session
+            return session
+
+    def backoff_delay(self, attempt, base):
+        # Full jitter: random delay between 0 and the exponential cap
+        return random.uniform(0, min(MAX_BACKOFF, base * (2 ** attempt)))
+
+    def request(self, method, url, priority=None, **kwargs):
+        """
+        priority is a script.scheduler class; by default the calling thread's
+        (scheduler.priority(...)), INTERACTIVE when it set none.
+        """
+        method = method.upper()
+        host = urlsplit(url).hostname or ""
+        settings = self.settings_for(host)
+        kwargs.setdefault("timeout", settings["timeout"])
+        session = self.session_for(host)
+
+        retries = settings["retries"] if method in RETRY_METHODS else 0
+        attempt = 0
+        while True:
+            # Raises CircuitOpenError right away while the host is tripped
+            throttle.before_request(url, timeout=settings["timeout"])
+            started = time.perf_counter()
+            try:
+                # One scheduler slot per attempt, so a backoff sleep does not hold it.
+                # For stream=True the slot covers the request up to the headers.
+                with scheduler.slot(priority, name=url):
+                    response = session.request(method, url, **kwargs)
+                # For stream=True this is time to headers and the body size is not known yet
+                size = self.body_size(response, kwargs)
+            except SchedulerStopped:
+                # Shutting down: nothing was sent, so nothing to record or retry
+                throttle.release_probe(url)
+                raise
+            except (requests.ConnectionError, requests.Timeout) as e:
+                log_request(method, url, type(e).__name__, -1, (time.perf_counter() - started) * 1000, attempt)
+                throttle.record(url, False)
+                if attempt >= retries:
+                    raise
+                logging.warning(f"{method} {url} failed ({e}), retry {attempt + 1}/{retries}")
+            except Exception as e:
+                # Any other error still ends the attempt; without a record a half-open
+                # probe would stay in flight and keep the host blocked
+                log_request(method, url, type(e).__name__, -1, (time.perf_counter() - started) * 1000, attempt)
+                throttle.record(url, False)
+                raise
+            else:
+                log_request(method, response.url, response.status_code, size,
+                            (time.perf_counter() - started) * 1000, attempt)
+                throttle.record(url, response.status_code not in RETRY_STATUSES)
+                if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                    return response
+                logging.warning(f"{method} {url} returned {response.status_code}, "
+                                f"retry {attempt + 1}/{retries}")
+                response.close()
+
+            time.sleep(self.backoff_delay(attempt, settings["backoff"]))
+            attempt += 1
+
+    def body_size(self, response, kwargs):
+        if not kwargs.get("stream"):
+            return len(response.content)
+        length = response.headers.get("Content-Length")
+        return int(length) if length and length.isdigit() else -1
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def head(self, url, **kwargs):
+        kwargs.setdefault("allow_redirects", False)
+        return self.request("HEAD", url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+
+# Shared instance used by every network call site
+http = HttpClient()
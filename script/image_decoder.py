@@ -0,0 +1,89 @@
+import logging
+import itertools
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QBuffer, QByteArray, QIODevice, QSize, Signal
+from PySide6.QtGui import QImageReader
+
+DECODE_THREADS = 2
+
+
+def decode_image(data, size=None):
+    """
+    Decode encoded image bytes into a QImage, downscaled to size=(w, h) pixels in the
+    same pass when given (the JPEG reader then skips most of the full-size work).
+    data may be a QByteArray (shared, not copied) or bytes. Returns None on failure.
+    """
+    if not isinstance(data, QByteArray):
+        data = QByteArray(data)
+    buffer = QBuffer()
+    buffer.setData(data)
+    buffer.open(QIODevice.ReadOnly)
+
+    reader = QImageReader(buffer)
+    reader.setAutoTransform(True)
+    if size:
+        reader.setScaledSize(QSize(*size))
+    image = reader.read()
+    buffer.close()
+    if image.isNull():
+        logging.debug(f"Image decode failed: {reader.errorString()}")
+        return None
+    return image
+
+
+class _Task(QRunnable):
+    def __init__(self, decoder, token, work):
+        super().__init__()
+        self.decoder = decoder
+        self.token = token
+        self.work = work
+
+    def run(self):
+        try:
+            result = self.work()
+        except Exception as e:
+            logging.warning(f"Image worker failed: {e}")
+            result = None
+        self.decoder.done.emit(self.token, result)
+
+
+class ImageDecoder(QObject):
+    """
+    Worker pool for image decoding and cache I/O. submit() runs work() on a pool
+    thread and hands the result to callback on the GUI thread, where only the
+    QPixmap conversion is left to do.
+    """
+    done = Signal(int, object)
+
+    def __init__(self, max_threads=DECODE_THREADS, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self._callbacks = {}
+        self._tokens = itertools.count()
+        self.done.connect(self._deliver)
+
+    def submit(self, work, callback):
+        token = next(self._tokens)
+        self._callbacks[token] = callback
+        self.pool.start(_Task(self, token, work))
+
+    def shutdown(self):
+        """Drop queued work and wait for the running tasks (on app exit)"""
+        self.pool.clear()
+        self.pool.waitForDone()
+        # Results still queued to the GUI thread have nobody left to show them
+        self._callbacks.clear()
+
+    def _deliver(self, token, result):
+        callback = self._callbacks.pop(token, None)
+        if callback is None:
+            return
+        try:
+            callback(result)
+        except RuntimeError as e:
+            # The widget waiting for the image was deleted while it was decoding
+            logging.debug(f"Dropped decoded image: {e}")
+
+
+image_decoder = ImageDecoder()
@@ -0,0 +1,123 @@
+import json
+import codecs
+
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = " \t\n\r"
+
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    """Text buffer over a chunk iterator; consumed text is dropped so memory stays flat."""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def more(self):
+        if self.eof:
+            return False
+        self.buffer = self.buffer[self.pos:]
+        self.pos = 0
+        for chunk in self.chunks:
+            text = self.decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+            if text:
+                self.buffer += text
+                return True
+        self.buffer += self.decoder.decode(b"", final=True)
+        self.eof = True
+        return False
+
+    def peek(self):
+        """Next non-whitespace character without consuming it ('' at end of input)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.more():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expected {char!r}", self.buffer, self.pos)
+        self.pos += 1
+
+    def value(self):
+        """Decode one complete JSON value, reading more input until it fits"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self.more():
+                    raise
+                continue
+            # A number at the very end of the buffer may still be cut off
+            if end == len(self.buffer) and not self.eof and self.buffer[self.pos] not in '{["':
+                self.more()
+                continue
+            self.pos = end
+            return value
+
+
+def _iter_array(reader):
+    reader.expect("[")
+    if reader.peek() == "]":
+        reader.pos += 1
+        return
+    while True:
+        yield reader.value()
+        sep = reader.peek()
+        reader.pos += 1
+        if sep == "]":
+            return
+        if sep != ",":
+            raise json.JSONDecodeError("Expected ',' or ']'", reader.buffer, reader.pos - 1)
+
+
+def iter_items(chunks, key="list", meta=None):
+    """
+    Yield the elements of a JSON array one at a time from an iterable of str/bytes chunks.
+    The array is either the document itself or the value of top-level `key`.
+    Other top-level values are decoded whole and stored in `meta` when a dict is given.
+    """
+    reader = _Reader(chunks)
+    if reader.peek() == "[":
+        yield from _iter_array(reader)
+        return
+
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        name = reader.value()
+        reader.expect(":")
+        if name == key and reader.peek() == "[":
+            yield from _iter_array(reader)
+        else:
+            value = reader.value()
+            if meta is not None:
+                meta[name] = value
+        sep = reader.peek()
+        reader.pos += 1
+        if sep == "}":
+            return
+        if sep != ",":
+            raise json.JSONDecodeError("Expected ',' or '}'", reader.buffer, reader.pos - 1)
+
+
+def iter_response_items(response, key="list", meta=None, chunk_size=CHUNK_SIZE):
+    """Stream items out of a requests response opened with stream=True"""
+    try:
+        yield from iter_items(response.iter_content(chunk_size=chunk_size), key=key, meta=meta)
+    finally:
+        response.close()
+
+
+def iter_file_items(path, key="list", meta=None, chunk_size=CHUNK_SIZE):
+    with open(path, "rb") as f:
+        yield from iter_items(iter(lambda: f.read(chunk_size), b""), key=key, meta=meta)
@@ -0,0 +1,138 @@
+import logging
+from collections import deque
+
+from PySide6.QtCore import QObject
+
+from script.pars import AnimeLoaderThread
+
+# Signals of AnimeLoaderThread a caller may subscribe to
+LOADER_SIGNALS = (
+    "error_occurred", "random_data_loaded", "random_item_loaded",
+    "page_loaded", "titles_loaded", "episodes_loaded",
+)
+
+
+class LoaderJob:
+    def __init__(self, key, group, attrs):
+        self.key = key
+        self.group = group
+        self.attrs = attrs
+        self.subscribers = []
+        self.thread = None
+        self.cancelled = False
+        self.done = False
+
+
+class LoaderManager(QObject):
+    """
+    Runs AnimeLoaderThread jobs for the UI.
+    - identical requests that are already in flight are merged into one thread;
+    - a new request in the same group supersedes the older one, which is asked to
+      stop and whose results are dropped;
+    - at most max_threads loaders run at once, the rest wait in a queue.
+    """
+
+    def __init__(self, max_threads=3, parent=None):
+        super().__init__(parent)
+        self.max_threads = max_threads
+        self.running = []
+        self.pending = deque()
+        self.coalesced = 0
+        self.superseded = 0
+
+    def submit(self, mode, group=None, handlers=None, on_finished=None, **attrs):
+        """
+        Start (or join) a loader. handlers maps LOADER_SIGNALS names to callables;
+        on_finished is called once the job is over, whether it succeeded, failed or was dropped.
+        """
+        key = (mode, tuple(sorted((k, repr(v)) for k, v in attrs.items())))
+        subscriber = {"handlers": dict(handlers or {}), "on_finished": on_finished}
+        group = group or mode
+
+        for job in list(self.running) + list(self.pending):
+            if job.key == key and not job.cancelled:
+                if subscriber not in job.subscribers:
+                    job.subscribers.append(subscriber)
+                self.coalesced += 1
+                return job
+
+        self.cancel_group(group)
+
+        job = LoaderJob(key, group, dict(attrs, mode=mode))
+        job.subscribers.append(subscriber)
+        self.pending.append(job)
+        self._start_pending()
+        return job
+
+    def in_flight(self, mode):
+        return any(job.key[0] == mode and not job.cancelled for job in list(self.running) + list(self.pending))
+
+    def cancel_group(self, group):
+        for job in list(self.pending):
+            if job.group == group:
+                self.pending.remove(job)
+                self._drop(job)
+        for job in self.running:
+            if job.group == group and not job.cancelled:
+                self._drop(job)
+                job.thread.requestInterruption()
+
+    def cancel_all(self):
+        for job in list(self.pending) + list(self.running):
+            self.cancel_group(job.group)
+
+    def shutdown(self):
+        """Cancel everything and wait for running loaders to exit (on app exit)"""
+        self.cancel_all()
+        for job in list(self.running):
+            if job.thread is not None:
+                job.thread.wait()
+
+    def _drop(self, job):
+        job.cancelled = True
+        self.superseded += 1
+        subscribers, job.subscribers = job.subscribers, []
+        for subscriber in subscribers:
+            if subscriber["on_finished"]:
+                subscriber["on_finished"]()
+
+    def _start_pending(self):
+        while self.pending and len(self.running) < self.max_threads:
+            job = self.pending.popleft()
+            thread = AnimeLoaderThread(self)
+            for name, value in job.attrs.items():
+                setattr(thread, name, value)
+
+            for name in LOADER_SIGNALS:
+                getattr(thread, name).connect(lambda *args, job=job, name=name: self._deliver(job, name, args))
+            thread.finished.connect(lambda job=job: self._finish(job))
+
+            job.thread = thread
+            self.running.append(job)
+            thread.start()
+
+    def _deliver(self, job, name, args):
+        if job.cancelled:
+            return
+        for subscriber in list(job.subscribers):
+            handler = subscriber["handlers"].get(name)
+            if handler:
+                handler(*args)
+
+    def _finish(self, job):
+        # Both AnimeLoaderThread.finished and QThread's own finished() end up here
+        if job.done:
+            return
+        job.done = True
+        if job in self.running:
+            self.running.remove(job)
+        if not job.cancelled:
+            for subscriber in job.subscribers:
+                if subscriber["on_finished"]:
+                    subscriber["on_finished"]()
+        if job.thread:
+            # finished is emitted from the end of run(); let the thread actually exit first
+            job.thread.wait()
+            job.thread.deleteLater()
+        logging.debug(f"Loader {job.key[0]} done, {len(self.running)} running, {len(self.pending)} queued")
+        self._start_pending()
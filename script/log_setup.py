@@ -0,0 +1,65 @@
+import atexit
+import logging
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(threadName)s - %(message)s'
+MAX_BYTES = 2 * 1024 * 1024
+BACKUP_COUNT = 3
+
+# Per-request trace records go to their own logger so they can be filtered or silenced
+request_log = logging.getLogger("search_anime.requests")
+
+_listener = None
+_lock = threading.Lock()
+
+
+def setup_logging(log_file, level=logging.INFO, max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT):
+    """
+    Route the root logger through a queue: callers (loader threads included) only
+    enqueue a record, a background listener does the file I/O and size-based rotation.
+    Safe to call more than once; only the first call installs the handlers.
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return _listener
+
+        file_handler = RotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True
+        )
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+        records = queue.SimpleQueue()
+        root = logging.getLogger()
+        root.addHandler(QueueHandler(records))
+        root.setLevel(level)
+
+        _listener = QueueListener(records, file_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+        return _listener
+
+
+def stop_logging():
+    """Flush whatever is still queued and stop the writer thread"""
+    global _listener
+    with _lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+def log_request(method, url, status, size, elapsed_ms, attempt=0):
+    """
+    One line per HTTP attempt, e.g.
+    request method=GET status=200 bytes=5123 elapsed_ms=84.2 attempt=0 url=https://...
+    status is the HTTP code or the exception name; size is -1 when unknown (streamed body).
+    """
+    request_log.info(
+        f"request method={method} status={status} bytes={size} "
+        f"elapsed_ms={elapsed_ms:.1f} attempt={attempt} url={url}"
+    )
@@ -1,43 +1,95 @@
 import os
+import re
 import json
 import requests
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
 from pathlib import Path
 from PySide6.QtCore import QThread, Signal
 
+from script.http_client import http
+from script.http_cache import response_cache
+from script.catalog import catalog
+from script.json_stream import iter_response_items, iter_file_items
+from script.log_setup import setup_logging
+from script.scheduler import scheduler, INTERACTIVE
+
 # Absolute paths
 BASE_DIR = Path(__file__).parent.parent
 LOG_FILE = BASE_DIR / "app.log"
 DATA_DIR = BASE_DIR / "data" / "online"
+API_URL = "https://api.anilibria.tv/v3/"
+
+# How many ids go into one title/list?id_list= request
+ID_BATCH_SIZE = 50
+
+# Pages at least this big are parsed as a stream instead of with response.json()
+STREAM_PAGE_SIZE = 50
+# Streamed titles are written to the catalog in transactions of this size
+INGEST_BATCH_SIZE = 25
+# Titles of the first streamed page handed to the UI; the rest only go to the catalog
+STREAM_EMIT_HEAD = 12
+
+# Poster variants the API returns, smallest first, with their approximate height in px
+# (None: full size). Grids pick the smallest that covers the card, detail pages the original.
+POSTER_VARIANTS = (("small", 350), ("medium", 700), ("original", None))
+# A variant this close to the needed height is used without visible upscaling
+POSTER_TOLERANCE = 0.9
+CARD_SIZE = (240, 360)
+# Device pixel ratio of the screen, set by the GUI through set_display_ratio()
+display_ratio = 1.0
+# Bump when the parsed item shape changes; cached parsed responses of older versions are not used
+PARSER_VERSION = 2
+
+# Query parameters per fetch profile. "summary" asks the API for the card/detail
+# fields only and leaves out player.list with its per-episode HLS links.
+FETCH_PROFILES = {
+    "summary": {'filter': "id,code,names,posters,genres,status,description,rating,updated"},
+    "episodes": {'filter': "id,player.list"},
+    "full": {},
+}
 
 # Ensure log directory exists
 LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
 
-logging.basicConfig(
-    filename=LOG_FILE,
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+# Records are queued and written by a background thread, with rotation
+setup_logging(LOG_FILE)
+
+
+# Character classes for origin detection: CJK ideographs and hiragana + katakana
+HAN_RE = re.compile('[\u4e00-\u9fff]')
+KANA_RE = re.compile('[\u3040-\u30ff]')
 
 
 def detect_origin_language(original_title):
     if not original_title:
         return "Other", False
 
-    if any('\u4e00' <= ch <= '\u9fff' for ch in original_title):
+    if HAN_RE.search(original_title):
         return "Chinese", True
 
-    if any(
-        '\u3040' <= ch <= '\u309f' or
-        '\u30a0' <= ch <= '\u30ff' or
-        '\u4e00' <= ch <= '\u9fff'
-        for ch in original_title
-    ):
+    if KANA_RE.search(original_title):
         return "Japanese", False
 
     return "Other", False
 
 
+def detect_origin_languages(titles):
+    """Batch form of detect_origin_language for bulk imports; same results, in order"""
+    han = HAN_RE.search
+    kana = KANA_RE.search
+    other = ("Other", False)
+    chinese = ("Chinese", True)
+    japanese = ("Japanese", False)
+    return [
+        other if not t or t.isascii() else
+        chinese if han(t) else
+        japanese if kana(t) else
+        other
+        for t in titles
+    ]
+
+
 def fix_image_url(url):
     if not url:
         return "default.jpg"
@@ -48,6 +100,37 @@ def fix_image_url(url):
     return url
 
 
+def set_display_ratio(dpr):
+    """Called by the GUI once the screen is known, so grid posters are picked for it"""
+    global display_ratio
+    display_ratio = dpr or 1.0
+
+
+def parse_variant():
+    """response_cache variant of parsed results: they depend on the parser and the DPR"""
+    return f"parser{PARSER_VERSION}@{display_ratio:g}x"
+
+
+def select_poster(posters, size=CARD_SIZE, dpr=None):
+    """
+    URL of the smallest poster variant that covers size (logical px) at dpr,
+    falling back to the next larger variant when one is missing and to the
+    biggest available one when none is large enough. size None means original.
+    """
+    posters = posters if isinstance(posters, dict) else {}
+    urls = [(name, height, (posters.get(name) or {}).get('url')) for name, height in POSTER_VARIANTS]
+    urls = [(name, height, url) for name, height, url in urls if url]
+    if not urls:
+        return None
+
+    if size:
+        needed = size[1] * (dpr or display_ratio) * POSTER_TOLERANCE
+        for name, height, url in urls:
+            if height is None or height >= needed:
+                return url
+    return urls[-1][2]
+
+
 def safe_rating(value):
     try:
         return round(float(value) / 2, 1) if value else "Н/Д"
@@ -55,23 +138,277 @@ def safe_rating(value):
         return "Н/Д"
 
 
+def format_random_item(item):
+    names = item.get('names', {})
+    title_original = names.get('original', '')
+    origin_lang, is_donghua = detect_origin_language(title_original)
+
+    posters = item.get('posters')
+    image_url = fix_image_url(select_poster(posters))
+
+    genres = item.get('genres', [])
+    genre_str = ", ".join(genres) if isinstance(genres, list) else "Жанр не вказано"
+
+    rating_value = safe_rating(item.get('rating', {}).get('average'))
+
+    return {
+        "id": item.get('id'),
+        "code": item.get('code'),
+        "title": names.get('ru') or names.get('en') or "No title",
+        "title_original": title_original,
+        "origin_lang": origin_lang,
+        "is_donghua": is_donghua,
+        "image": image_url,
+        "image_original": fix_image_url(select_poster(posters, size=None)),
+        "description": item.get('description', 'No description')[:200] + "..."
+        if item.get('description') else "No description",
+        "genre": genre_str,
+        "rating": rating_value,
+        "updated": item.get('updated')
+    }
+
+
+def parse_episodes(player):
+    episodes_info = []
+    episodes = (player or {}).get('list') or {}
+    for episode_num, episode_data in episodes.items():
+        try:
+            episodes_info.append({
+                "episode": episode_num,
+                "title": episode_data.get('name', f"Серія {episode_num}"),
+                "opening": episode_data.get('opening', []),
+                "ending": episode_data.get('ending', []),
+                "video": episode_data.get('hls'),
+                "navi": episode_data.get('navi'),
+                "preview": episode_data.get('preview')
+            })
+        except Exception as ep_err:
+            logging.warning(f"Не вдалося обробити епізод {episode_num}: {ep_err}")
+    return episodes_info
+
+
+def format_top_item(item, origin=None):
+    names = item.get('names') or {}
+    title_original = names.get('original', '')
+    origin_lang, is_donghua = origin or detect_origin_language(title_original)
+
+    title = names.get('ru') or names.get('en') or item.get('code') or "Без назви"
+    title_ru = names.get('ru', 'Без названия')
+
+    posters = item.get('posters')
+    image_url = fix_image_url(select_poster(posters) or item.get('poster'))
+    original_url = fix_image_url(select_poster(posters, size=None) or item.get('poster'))
+
+    genres = item.get('genres', []) if isinstance(item.get('genres'), list) else []
+    genre_str = ", ".join([g for g in genres if isinstance(g, str)]) or "Жанр не вказано"
+
+    status_str = item.get('status', {}).get('string', 'Невідомо')
+
+    description = str(item.get('description', '')).strip() or 'Опис відсутній'
+    description_ru = description or 'Описание отсутствует'
+
+    rating_5 = safe_rating(item.get('rating', {}).get('average'))
+
+    result = {
+        "id": item.get('id'),
+        "code": item.get('code'),
+        "title": title,
+        "title_ru": title_ru,
+        "title_original": title_original,
+        "origin_lang": origin_lang,
+        "is_donghua": is_donghua,
+        "image": image_url,
+        "image_original": original_url,
+        "genre": genre_str,
+        "status": status_str,
+        "description": description,
+        "description_ru": description_ru,
+        "rating": rating_5,
+        "updated": item.get('updated')
+    }
+    # Summary responses carry no player; episodes are then fetched on demand
+    if 'player' in item:
+        result["episodes"] = parse_episodes(item['player'])
+    return result
+
+
+def format_top_items(items):
+    """Normalise a list of API titles, classifying all original titles in one batch"""
+    items = [item for item in items if isinstance(item, dict)]
+    origins = detect_origin_languages([(item.get('names') or {}).get('original', '') for item in items])
+    return [format_top_item(item, origin) for item, origin in zip(items, origins)]
+
+
+def parse_top_anime(data):
+    return format_top_items(data.get('list', []))
+
+
+def parse_updates_page(data):
+    return {
+        "items": parse_top_anime(data),
+        "pages": (data.get('pagination') or {}).get('pages')
+    }
+
+
+def stream_titles(url, params=None, headers=None, meta=None):
+    """Yield raw titles from the response's `list` array as they are downloaded"""
+    response = http.get(url, params=params, headers=headers, stream=True)
+    response.raise_for_status()
+    return iter_response_items(response, meta=meta)
+
+
+def ingest_titles(raw_items, list_name=None, start_position=0, on_item=None, should_stop=None,
+                  batch_size=INGEST_BATCH_SIZE):
+    """
+    Normalise raw titles as they arrive and write them to the catalog in small batches,
+    so memory does not grow with the payload. Returns the number stored.
+    """
+    stored = 0
+    batch = []
+    for raw in raw_items:
+        if should_stop and should_stop():
+            break
+        if not isinstance(raw, dict):
+            continue
+        item = format_top_item(raw)
+        batch.append(item)
+        if on_item:
+            on_item(item)
+        if len(batch) >= batch_size:
+            catalog.upsert(batch, list_name=list_name, start_position=start_position + stored)
+            stored += len(batch)
+            batch = []
+    if batch:
+        catalog.upsert(batch, list_name=list_name, start_position=start_position + stored)
+        stored += len(batch)
+    return stored
+
+
+def ingest_dump(path, list_name=None, should_stop=None):
+    """Import an offline catalog dump (an API-style {"list": [...]} or a bare array)"""
+    return ingest_titles(iter_file_items(path), list_name=list_name, should_stop=should_stop)
+
+
+def fetch_random_title(url=f"{API_URL}title/random", headers=None, timeout=10, profile="summary"):
+    headers = headers or {
+        'User-Agent': 'Mozilla/5.0',
+        'Accept': 'application/json'
+    }
+    response = http.get(url, params=FETCH_PROFILES[profile], headers=headers, timeout=timeout)
+    response.raise_for_status()
+    return format_random_item(response.json())
+
+
+def fetch_episodes(title_id, base_url=API_URL, store=True):
+    """Load the episode list of one title (used when its detail page or player is opened)"""
+    params = dict(FETCH_PROFILES["episodes"], id=title_id)
+    headers = {
+        'User-Agent': 'Mozilla/5.0',
+        'Accept': 'application/json'
+    }
+    response = http.get(f"{base_url}title", params=params, headers=headers)
+    response.raise_for_status()
+
+    episodes = parse_episodes(response.json().get('player'))
+    if store:
+        catalog.set_episodes(title_id, episodes)
+    return episodes
+
+
+def fetch_titles_by_id(ids, batch_size=ID_BATCH_SIZE, base_url=API_URL, store=True, profile="summary",
+                       should_stop=None):
+    """
+    Fetch many titles with title/list?id_list= in batches of batch_size.
+    Returns {id: normalised item}; ids the API did not return are missing from the result.
+    """
+    url = f"{base_url}title/list"
+    headers = {
+        'User-Agent': 'Mozilla/5.0',
+        'Accept': 'application/json'
+    }
+
+    unique_ids = list(dict.fromkeys(int(i) for i in ids))
+    results = {}
+
+    for start in range(0, len(unique_ids), batch_size):
+        if should_stop and should_stop():
+            break
+        batch = unique_ids[start:start + batch_size]
+        params = dict(FETCH_PROFILES[profile], id_list=",".join(map(str, batch)))
+        response = http.get(url, params=params, headers=headers)
+        response.raise_for_status()
+        data = response.json()
+
+        raw_items = data.get('list', []) if isinstance(data, dict) else data
+        items = format_top_items(raw_items)
+        if store:
+            catalog.upsert(items)
+        for item in items:
+            if item.get("id") is not None:
+                results[item["id"]] = item
+
+    return results
+
+
 class AnimeLoaderThread(QThread):
     error_occurred = Signal(str)
     finished = Signal()
     random_data_loaded = Signal(list)
+    random_item_loaded = Signal(dict)
+    page_loaded = Signal(int, list)
+    # id -> title; object, a dict with int keys cannot be converted to a Qt QVariantMap
+    titles_loaded = Signal(object)
+    episodes_loaded = Signal(int, list)
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.base_url = "https://api.anilibria.tv/v3/"
+        self.base_url = API_URL
         self.mode = "top"
+        self.fetch_profile = "summary"
+
+        # Random mode: parallel requests, per-request timeout and overall deadline (seconds)
+        self.random_workers = 4
+        self.random_timeout = 10
+        self.random_deadline = 12
+
+        # Top mode: title/updates is walked page by page up to max_pages
+        self.page_size = 8
+        self.max_pages = 5
+
+        # Ids mode: titles to fetch with fetch_titles_by_id
+        self.ids = []
+        self.id_batch_size = ID_BATCH_SIZE
+
+        # Episodes mode: the title whose playlist is loaded lazily
+        self.title_id = None
+
+        # Dump mode: offline catalog dump to stream into the catalog
+        self.dump_path = None
+
+        # Scheduler class of every request this loader makes
+        self.priority = INTERACTIVE
 
     def run(self):
+        with scheduler.priority(self.priority):
+            self.run_mode()
+
+    def run_mode(self):
         try:
             if self.mode == "top":
                 self.load_top_anime_week()
             elif self.mode == "random":
                 data = self.load_random_anime(count=12)
                 self.random_data_loaded.emit(data)
+            elif self.mode == "ids":
+                data = fetch_titles_by_id(self.ids, batch_size=self.id_batch_size, base_url=self.base_url,
+                                          profile=self.fetch_profile, should_stop=self.isInterruptionRequested)
+                self.titles_loaded.emit(data)
+            elif self.mode == "episodes":
+                episodes = fetch_episodes(self.title_id, base_url=self.base_url)
+                self.episodes_loaded.emit(self.title_id, episodes)
+            elif self.mode == "dump":
+                count = ingest_dump(self.dump_path, should_stop=self.isInterruptionRequested)
+                logging.info(f"Imported {count} titles from {self.dump_path}")
         except Exception as e:
             error_msg = f"Error in thread: {str(e)}"
             self.error_occurred.emit(error_msg)
@@ -89,49 +426,41 @@ class AnimeLoaderThread(QThread):
 
             formatted_data = []
 
-            for _ in range(count):
-                try:
-                    response = requests.get(url, headers=headers, timeout=10)
-                    response.raise_for_status()
-                    item = response.json()
-
-                    names = item.get('names', {})
-                    title_original = names.get('original', '')
-                    origin_lang, is_donghua = detect_origin_language(title_original)
-
-                    image_url = fix_image_url(item.get('posters', {}).get('original', {}).get('url'))
-
-                    genres = item.get('genres', [])
-                    genre_str = ", ".join(genres) if isinstance(genres, list) else "Жанр не вказано"
-
-                    rating_value = safe_rating(item.get('rating', {}).get('average'))
-
-                    formatted_data.append({
-                        "title": names.get('ru') or names.get('en') or "No title",
-                        "title_original": title_original,
-                        "origin_lang": origin_lang,
-                        "is_donghua": is_donghua,
-                        "image": image_url,
-                        "description": item.get('description', 'No description')[:200] + "..."
-                        if item.get('description') else "No description",
-                        "genre": genre_str,
-                        "rating": rating_value
-                    })
-
-                except Exception as item_error:
-                    logging.warning(f"Error loading random anime item: {item_error}")
-                    continue
+            # Fan the requests out over a small pool and emit each title as soon as it arrives
+            pool = ThreadPoolExecutor(max_workers=max(1, min(self.random_workers, count)))
+            futures = [pool.submit(self.fetch_random_item, url, headers) for _ in range(count)]
+            try:
+                for future in as_completed(futures, timeout=self.random_deadline):
+                    if self.isInterruptionRequested():
+                        break
+                    try:
+                        item = future.result()
+                    except Exception as item_error:
+                        logging.warning(f"Error loading random anime item: {item_error}")
+                        continue
+
+                    if self.isInterruptionRequested():
+                        break
+                    catalog.upsert([item], list_name="random", start_position=len(formatted_data))
+                    formatted_data.append(item)
+                    self.random_item_loaded.emit(item)
+            except FuturesTimeout:
+                logging.warning(
+                    f"Random anime deadline ({self.random_deadline} s) reached, "
+                    f"got {len(formatted_data)} of {count}"
+                )
+            finally:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+            if self.isInterruptionRequested():
+                # Superseded: the "random" list may already hold the newer batch, leave it alone
+                return formatted_data
 
             if not formatted_data:
                 raise ValueError("No valid random anime data retrieved.")
 
-            DATA_DIR.mkdir(parents=True, exist_ok=True)
-            output_file = DATA_DIR / "random.json"
-            try:
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(formatted_data, f, ensure_ascii=False, indent=2)
-            except Exception as save_err:
-                logging.error(f"Failed to save random.json: {save_err}")
+            # Drop entries left over from a previous, longer batch
+            catalog.clear_list("random", from_position=len(formatted_data))
 
             return formatted_data
 
@@ -140,83 +469,61 @@ class AnimeLoaderThread(QThread):
             logging.error(error_msg, exc_info=True)
             raise
 
+    def fetch_random_item(self, url, headers):
+        # Runs on a pool thread, which does not inherit the loader's priority
+        with scheduler.priority(self.priority):
+            return fetch_random_title(url, headers, timeout=self.random_timeout, profile=self.fetch_profile)
+
     def load_top_anime_week(self):
         try:
             url = f"{self.base_url}title/updates"
-            params = {'limit': 8}
             headers = {
                 'User-Agent': 'Mozilla/5.0',
                 'Accept': 'application/json'
             }
 
-            response = requests.get(url, params=params, headers=headers, timeout=15)
-            response.raise_for_status()
-
-            data = response.json()
-            items = data.get('list', [])
-            new_data = []
-
-            for item in items:
-                if not isinstance(item, dict):
-                    continue
-
-                names = item.get('names') or {}
-                title_original = names.get('original', '')
-                origin_lang, is_donghua = detect_origin_language(title_original)
-
-                title = names.get('ru') or names.get('en') or item.get('code') or "Без назви"
-                title_ru = names.get('ru', 'Без названия')
-
-                image_url = fix_image_url(item.get('posters', {}).get('original', {}).get('url') or item.get('poster'))
-
-                genres = item.get('genres', []) if isinstance(item.get('genres'), list) else []
-                genre_str = ", ".join([g for g in genres if isinstance(g, str)]) or "Жанр не вказано"
-
-                status_str = item.get('status', {}).get('string', 'Невідомо')
-
-                description = str(item.get('description', '')).strip() or 'Опис відсутній'
-                description_ru = description or 'Описание отсутствует'
-
-                rating_5 = safe_rating(item.get('rating', {}).get('average'))
-
-                episodes_info = []
-                episodes = item.get('player', {}).get('list') or {}
-                for episode_num, episode_data in episodes.items():
-                    try:
-                        episodes_info.append({
-                            "episode": episode_num,
-                            "title": episode_data.get('name', f"Серія {episode_num}"),
-                            "opening": episode_data.get('opening', []),
-                            "ending": episode_data.get('ending', []),
-                            "video": episode_data.get('hls'),
-                            "navi": episode_data.get('navi'),
-                            "preview": episode_data.get('preview')
-                        })
-                    except Exception as ep_err:
-                        logging.warning(f"Не вдалося обробити епізод {episode_num}: {ep_err}")
-
-                new_data.append({
-                    "title": title,
-                    "title_ru": title_ru,
-                    "title_original": title_original,
-                    "origin_lang": origin_lang,
-                    "is_donghua": is_donghua,
-                    "image": image_url,
-                    "genre": genre_str,
-                    "status": status_str,
-                    "description": description,
-                    "description_ru": description_ru,
-                    "rating": rating_5,
-                    "episodes": episodes_info
-                })
-
-            DATA_DIR.mkdir(parents=True, exist_ok=True)
-            output_file = DATA_DIR / "rec_anime.json"
-            try:
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(new_data, f, ensure_ascii=False, indent=2)
-            except Exception as save_err:
-                logging.error(f"Failed to save rec_anime.json: {save_err}")
+            stored = 0
+            page = 1
+            while page <= self.max_pages and not self.isInterruptionRequested():
+                params = dict(FETCH_PROFILES[self.fetch_profile], page=page, items_per_page=self.page_size)
+
+                if self.page_size >= STREAM_PAGE_SIZE:
+                    # Large pages: parse and store title by title instead of building the whole tree.
+                    # Only a bounded head of page 1 is kept in memory for the home grid
+                    meta = {}
+                    items = []
+
+                    def keep_head(item, first_page=page == 1):
+                        if first_page and len(items) < STREAM_EMIT_HEAD:
+                            items.append(item)
+
+                    count = ingest_titles(
+                        stream_titles(url, params=params, headers=headers, meta=meta),
+                        list_name="top", start_position=stored, on_item=keep_head,
+                        should_stop=self.isInterruptionRequested
+                    )
+                    pages = (meta.get('pagination') or {}).get('pages')
+                else:
+                    # Served from the on-disk cache while fresh, revalidated with ETag otherwise
+                    result = response_cache.fetch(url, params=params, headers=headers, parse=parse_updates_page,
+                                                  variant=parse_variant())
+                    catalog.upsert(result["items"], list_name="top", start_position=stored)
+                    items, pages = result["items"], result["pages"]
+                    count = len(items)
+
+                stored += count
+                if not count:
+                    break
+
+                if items:
+                    self.page_loaded.emit(page, items)
+
+                if pages and page >= pages:
+                    break
+                page += 1
+
+            if stored:
+                catalog.clear_list("top", from_position=stored)
 
         except requests.RequestException as e:
             error_msg = f"Network error: {str(e)}"
@@ -229,4 +536,4 @@ class AnimeLoaderThread(QThread):
         except Exception as e:
             error_msg = f"Unexpected error: {str(e)}"
             logging.error(error_msg, exc_info=True)
-            raise
\ No newline at end of file
+            raise
@@ -0,0 +1,390 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from PySide6.QtCore import QByteArray, QBuffer, QIODevice, QUrl
+from PySide6.QtNetwork import QNetworkRequest, QNetworkReply
+
+from script.image_decoder import image_decoder, decode_image
+from script.render_cache import device_pixel_ratio
+from script.preview import save_preview, fill_preview
+
+BASE_DIR = Path(__file__).parent.parent
+POSTER_DIR = BASE_DIR / "data" / "cache" / "posters"
+THUMB_DIR = BASE_DIR / "data" / "cache" / "thumbs"
+
+MEMORY_BYTES = 64 * 1024 * 1024      # decoded images kept in RAM
+DISK_BYTES = 200 * 1024 * 1024       # encoded files kept on disk
+POSTER_TTL = 7 * 24 * 60 * 60        # after that a poster is revalidated with the server
+THUMB_BYTES = 40 * 1024 * 1024       # card-sized derivatives kept on disk
+THUMB_QUALITY = 85                   # JPEG quality of the derivatives; no visible loss at card size
+
+
+class MemoryLRU:
+    """Decoded QImages by (url, size), bounded by their size in bytes."""
+
+    def __init__(self, max_bytes=MEMORY_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        with self._lock:
+            image = self._items.get(url)
+            if image is not None:
+                self._items.move_to_end(url)
+            return image
+
+    def put(self, url, image):
+        size = image.sizeInBytes()
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(url, None)
+            if old is not None:
+                self.bytes -= old.sizeInBytes()
+            self._items[url] = image
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.bytes -= evicted.sizeInBytes()
+
+    def discard(self, url):
+        with self._lock:
+            old = self._items.pop(url, None)
+            if old is not None:
+                self.bytes -= old.sizeInBytes()
+
+
+class DiskStore:
+    """
+    Encoded poster bytes on disk, one `<sha1>.img` per URL plus a `<sha1>.json`
+    with the validators (ETag / Last-Modified), the time the bytes were stored
+    and the time they were last checked.
+    """
+
+    def __init__(self, cache_dir=POSTER_DIR, max_bytes=DISK_BYTES, ttl=POSTER_TTL):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._size = None
+
+    def key(self, url):
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def paths(self, url):
+        key = self.key(url)
+        return self.cache_dir / f"{key}.img", self.cache_dir / f"{key}.json"
+
+    def meta(self, url):
+        _, meta_path = self.paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def read(self, url):
+        """(bytes, meta) or (None, None)"""
+        data_path, _ = self.paths(url)
+        meta = self.meta(url)
+        if meta is None:
+            return None, None
+        try:
+            data = data_path.read_bytes()
+        except OSError:
+            return None, None
+        # Reading counts as use for eviction
+        os.utime(data_path)
+        return data, meta
+
+    def write(self, url, data, etag=None, last_modified=None):
+        data_path, meta_path = self.paths(url)
+        now = time.time()
+        meta = {"url": url, "etag": etag, "last_modified": last_modified, "stored_at": now, "checked_at": now}
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            old_size = data_path.stat().st_size if data_path.exists() else 0
+            tmp_path = data_path.with_suffix(".tmp")
+            tmp_path.write_bytes(data)
+            tmp_path.replace(data_path)
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+        except OSError as e:
+            logging.error(f"Failed to write poster cache entry: {e}")
+            return
+        with self._lock:
+            if self._size is not None:
+                self._size += len(data) - old_size
+        self.evict()
+
+    def touch(self, url):
+        """Server said 304: keep the bytes, restart the TTL"""
+        meta = self.meta(url)
+        if meta is None:
+            return
+        meta["checked_at"] = time.time()
+        _, meta_path = self.paths(url)
+        try:
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+        except OSError as e:
+            logging.warning(f"Failed to update poster cache entry: {e}")
+
+    def remove(self, url):
+        for path in self.paths(url):
+            path.unlink(missing_ok=True)
+        with self._lock:
+            self._size = None
+
+    def evict(self):
+        """Drop least recently used files until the store fits in max_bytes"""
+        with self._lock:
+            if self._size is not None and self._size <= self.max_bytes:
+                return
+            files = []
+            total = 0
+            for path in self.cache_dir.glob("*.img"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+            files.sort()
+            removed = 0
+            for _, size, path in files:
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                path.with_suffix(".json").unlink(missing_ok=True)
+                total -= size
+                removed += 1
+            self._size = total
+        if removed:
+            logging.info(f"Poster cache ({self.cache_dir.name}) evicted {removed} files, {total // 1024} KB left")
+
+
+class PosterCache:
+    """
+    Poster lookup shared by every page: memory LRU of decoded images first,
+    then the disk store, then the network. Stale disk entries are still shown
+    while a conditional request checks whether they changed.
+
+    Images are kept per (url, size): grids ask for card-sized images, the detail
+    page for the full poster (size None). A card-sized image is also saved to a
+    separate disk store as a small JPEG, so grids later decode that derivative
+    instead of the full download.
+    lookup/store are synchronous (for worker threads), load/from_reply do the
+    disk I/O and decoding in the image_decoder pool (for the GUI thread).
+    on_new_image(url, image) is called on the storing thread whenever a new
+    body has been downloaded and decoded for a card; on_cached_image(url, image)
+    when a card-sized image is read back from disk rather than from memory.
+    Full-size decodes (size None) call neither.
+    """
+
+    def __init__(self, memory=None, disk=None, thumbs=None, decoder=image_decoder,
+                 on_new_image=None, on_cached_image=None):
+        self.memory = memory or MemoryLRU()
+        self.disk = disk or DiskStore()
+        self.thumbs = thumbs or DiskStore(THUMB_DIR, THUMB_BYTES)
+        self.decoder = decoder
+        self.on_new_image = on_new_image
+        self.on_cached_image = on_cached_image
+        # url -> time it was last confirmed by the server, saves re-reading the meta file
+        self._checked = {}
+        self.hits = 0
+        self.misses = 0
+
+    def pixel_size(self, size):
+        """Logical card size -> decode size in device pixels (GUI thread)"""
+        if not size:
+            return None
+        dpr = device_pixel_ratio()
+        return round(size[0] * dpr), round(size[1] * dpr)
+
+    def cached(self, url, size=None):
+        """(QImage or None, fresh) from memory only; cheap enough for the GUI thread"""
+        image = self.memory.get((url, size))
+        if image is None:
+            return None, False
+        self.hits += 1
+        return image, self.is_fresh(url)
+
+    def lookup(self, url, size=None):
+        """(QImage or None, fresh). fresh=False means the caller should revalidate or download."""
+        image, fresh = self.cached(url, size)
+        if image is not None:
+            return image, fresh
+
+        if size:
+            image = self.read_thumbnail(url, size)
+            if image is not None:
+                self.hits += 1
+                self.memory.put((url, size), image)
+                self.notify(self.on_cached_image, url, size, image)
+                return image, self.is_fresh(url)
+
+        data, meta = self.disk.read(url)
+        if data is not None:
+            image = decode_image(data, size)
+            if image is not None:
+                self.hits += 1
+                self._checked[url] = meta.get("checked_at", 0)
+                self.memory.put((url, size), image)
+                if size:
+                    self.write_thumbnail(url, size, image)
+                self.notify(self.on_cached_image, url, size, image)
+                return image, self.is_fresh(url)
+            self.disk.remove(url)
+
+        self.misses += 1
+        return None, False
+
+    def load(self, url, size, callback):
+        """
+        Async lookup for the GUI thread: callback((image, fresh)) runs on the GUI thread,
+        right away on a memory hit, after a disk read + decode in the pool otherwise.
+        """
+        size = self.pixel_size(size)
+        image, fresh = self.cached(url, size)
+        if image is not None:
+            callback((image, fresh))
+            return
+        self.decoder.submit(lambda: self.lookup(url, size), lambda result: callback(result or (None, False)))
+
+    def is_fresh(self, url):
+        checked_at = self._checked.get(url)
+        if checked_at is None:
+            meta = self.disk.meta(url)
+            checked_at = self._checked[url] = meta.get("checked_at", 0) if meta else 0
+        return time.time() - checked_at < self.disk.ttl
+
+    def store(self, url, data, etag=None, last_modified=None, size=None):
+        """Save downloaded bytes; returns the decoded QImage (None if it is not an image)"""
+        image = decode_image(data, size)
+        if image is None:
+            return None
+        if isinstance(data, QByteArray):
+            data = data.data()
+        self.disk.write(url, data, etag, last_modified)
+        self._checked[url] = time.time()
+        self.memory.put((url, size), image)
+        if size:
+            self.write_thumbnail(url, size, image)
+        self.notify(self.on_new_image, url, size, image)
+        return image
+
+    def notify(self, hook, url, size, image):
+        # Hooks key on the grid poster URL, so only card-sized decodes are passed on
+        if hook is None or not size:
+            return
+        try:
+            hook(url, image)
+        except Exception as e:
+            logging.warning(f"Poster hook failed for {url}: {e}")
+
+    def thumbnail_key(self, url, size):
+        return f"{url}#{size[0]}x{size[1]}"
+
+    def read_thumbnail(self, url, size):
+        """Card-sized derivative of url, None when missing or older than the stored original"""
+        data, meta = self.thumbs.read(self.thumbnail_key(url, size))
+        if data is None:
+            return None
+        source = self.disk.meta(url)
+        if source is None or meta.get("checked_at", 0) < source.get("stored_at", 0):
+            return None
+        # Already at the card's pixel size, nothing to scale
+        return decode_image(data)
+
+    def write_thumbnail(self, url, size, image):
+        """Re-encode a card-sized decode of url into the derivative store"""
+        data = QByteArray()
+        buffer = QBuffer(data)
+        buffer.open(QIODevice.WriteOnly)
+        saved = image.save(buffer, "JPEG", THUMB_QUALITY)
+        buffer.close()
+        if saved:
+            self.thumbs.write(self.thumbnail_key(url, size), data.data())
+
+    def make_request(self, url):
+        """QNetworkRequest for url, conditional when a stored copy exists"""
+        request = QNetworkRequest(QUrl(url))
+        meta = self.disk.meta(url)
+        if meta:
+            if meta.get("etag"):
+                request.setRawHeader(b"If-None-Match", meta["etag"].encode("latin-1"))
+            if meta.get("last_modified"):
+                request.setRawHeader(b"If-Modified-Since", meta["last_modified"].encode("latin-1"))
+        return request
+
+    def from_reply(self, url, reply, sizes, callback):
+        """
+        Finish a reply made with make_request(url) for every size that is waiting for it:
+        a new body is stored once and decoded per size in the pool, a 304 only
+        restarts the TTL. callback(size, image) runs on the GUI thread per size,
+        image is None when the body could not be decoded.
+        url must be the string the request was made for: QUrl.toString() would
+        give back a normalised form that is cached under another key.
+        """
+        if reply.error() != QNetworkReply.NoError:
+            return
+        targets = [(size, self.pixel_size(size)) for size in sizes]
+        status = reply.attribute(QNetworkRequest.HttpStatusCodeAttribute)
+        if status == 304:
+            self.disk.touch(url)
+            self._checked[url] = time.time()
+
+            def work():
+                return [(size, self.lookup(url, pixels)[0]) for size, pixels in targets]
+        else:
+            etag = bytes(reply.rawHeader("ETag")).decode("latin-1") or None
+            last_modified = bytes(reply.rawHeader("Last-Modified")).decode("latin-1") or None
+            # The reply belongs to the GUI thread and is deleted after this returns, so its
+            # body is taken once as a QByteArray; the worker decodes it through a QBuffer
+            # without copying it again
+            data = reply.readAll()
+
+            def work():
+                return self.store_sizes(url, data, etag, last_modified, targets)
+
+        def deliver(results):
+            for size, image in results or [(size, None) for size, _ in targets]:
+                callback(size, image)
+
+        self.decoder.submit(work, deliver)
+
+    def store_sizes(self, url, data, etag, last_modified, targets):
+        """Write the body to disk once, decode it for each (size, pixels) target"""
+        results = []
+        # store() only reports a card-sized first target
+        notified = bool(targets and targets[0][1])
+        for i, (size, pixels) in enumerate(targets):
+            if i == 0:
+                image = self.store(url, data, etag, last_modified, pixels)
+                if image is None:
+                    return [(size, None) for size, _ in targets]
+            else:
+                image = decode_image(data, pixels)
+                if image is not None:
+                    self.memory.put((url, pixels), image)
+                    if pixels:
+                        self.write_thumbnail(url, pixels, image)
+                        if not notified:
+                            self.notify(self.on_new_image, url, pixels, image)
+                            notified = True
+            results.append((size, image))
+        return results
+
+
+# Every grid poster leaves a tiny preview in the catalog for the next launch
+poster_cache = PosterCache(on_new_image=save_preview, on_cached_image=fill_preview)
@@ -0,0 +1,217 @@
+import logging
+
+from PySide6.QtCore import QObject, QTimer
+from PySide6.QtNetwork import QNetworkAccessManager, QNetworkReply
+
+from script.poster_cache import poster_cache
+from script.throttle import throttle, CircuitOpenError
+from script.scheduler import scheduler, VISIBLE
+
+# Log the deduplication rate every this many poster requests
+REPORT_EVERY = 100
+THROTTLE_RETRY_MS = 200
+
+
+class PosterRequest:
+    """One widget waiting for a poster; returned by fetch() so it can be cancelled."""
+
+    def __init__(self, url, size, callback, priority=VISIBLE):
+        self.url = url
+        self.size = size
+        self.callback = callback
+        self.priority = priority
+        self.shown = False
+        self.cancelled = False
+
+    def deliver(self, image):
+        if self.cancelled:
+            return
+        if image is None and self.shown:
+            # Keep the stale copy on screen rather than replacing it with "not found"
+            return
+        self.shown = self.shown or image is not None
+        try:
+            self.callback(image)
+        except RuntimeError as e:
+            # The widget was deleted while the poster was loading
+            logging.debug(f"Dropped poster for {self.url}: {e}")
+
+
+class Flight:
+    """A download in progress and everyone waiting for it."""
+
+    def __init__(self, url, priority):
+        self.url = url
+        # The most urgent class among the waiters
+        self.priority = priority
+        self.waiters = []
+        self.ticket = None
+        self.reply = None
+
+
+class PosterFetcher(QObject):
+    """
+    App-wide poster loader and owner of the only QNetworkAccessManager.
+    Poster cache first, then the network; concurrent requests for the same URL
+    share a single download whose result is fanned out to every waiter.
+    Downloads start when the network scheduler grants their class a slot.
+    """
+
+    def __init__(self, cache=poster_cache, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.network_manager = None
+        self.flights = {}
+        self.requests = 0
+        self.downloads = 0
+        self.coalesced = 0
+
+    def manager(self):
+        # Created on first use, after the QApplication exists
+        if self.network_manager is None:
+            self.network_manager = QNetworkAccessManager(self)
+        return self.network_manager
+
+    def fetch(self, url, size, callback, owner=None, priority=VISIBLE):
+        """
+        Load the poster at url decoded for size (logical px, None for full size).
+        callback(image) runs on the GUI thread, possibly twice: a stale cached copy
+        first, then the revalidated one. image is None when nothing could be loaded.
+        When the owner QObject is destroyed the request is cancelled.
+        priority is a script.scheduler class (PREFETCH for posters off screen).
+        """
+        request = PosterRequest(url, size, callback, priority)
+        if owner is not None:
+            owner.destroyed.connect(lambda *args: self.cancel(request))
+        self.requests += 1
+        if self.requests % REPORT_EVERY == 0:
+            logging.info(self.report())
+        self.cache.load(url, size, lambda result: self._on_cached(request, *result))
+        return request
+
+    def raise_priority(self, request, priority):
+        """Make a waiting request more urgent, e.g. when its card scrolls into view"""
+        if request.cancelled or priority >= request.priority:
+            return
+        request.priority = priority
+        flight = self.flights.get(request.url)
+        if flight is not None and request in flight.waiters:
+            self._bump(flight, priority)
+
+    def cancel(self, request):
+        """Stop delivering to request; the download is aborted once nobody waits for it"""
+        request.cancelled = True
+        flight = self.flights.get(request.url)
+        if flight is None or request not in flight.waiters:
+            return
+        flight.waiters.remove(request)
+        if not flight.waiters:
+            del self.flights[request.url]
+            if flight.reply is not None:
+                flight.reply.abort()
+            elif flight.ticket is not None:
+                # Still queued in the scheduler: it never reaches the network
+                scheduler.cancel(flight.ticket)
+
+    def dedup_rate(self):
+        joined = self.downloads + self.coalesced
+        return self.coalesced / joined if joined else 0.0
+
+    def report(self):
+        return (f"Posters: {self.requests} requests, {self.downloads} downloads, "
+                f"{self.coalesced} merged into a running download ({self.dedup_rate():.0%})")
+
+    def _on_cached(self, request, image, fresh):
+        if request.cancelled:
+            return
+        if image is not None:
+            request.deliver(image)
+            if fresh:
+                return
+
+        flight = self.flights.get(request.url)
+        if flight is not None:
+            flight.waiters.append(request)
+            self._bump(flight, request.priority)
+            self.coalesced += 1
+            return
+
+        flight = Flight(request.url, request.priority)
+        flight.waiters.append(request)
+        self.flights[request.url] = flight
+        self._queue(flight)
+
+    def _queue(self, flight):
+        if self.flights.get(flight.url) is not flight:
+            return  # everyone cancelled while it waited for a token
+        flight.ticket = scheduler.submit(flight.priority, lambda ticket: self._start(flight, ticket), name=flight.url)
+
+    def _bump(self, flight, priority):
+        if priority < flight.priority:
+            flight.priority = priority
+            if flight.ticket is not None:
+                scheduler.raise_priority(flight.ticket, priority)
+
+    def _start(self, flight, ticket=None):
+        # With a free slot this runs inside scheduler.submit(), before flight.ticket is set
+        if ticket is not None:
+            flight.ticket = ticket
+        if self.flights.get(flight.url) is not flight:
+            scheduler.release(flight.ticket)
+            return  # everyone cancelled while it waited for a token
+        try:
+            if not throttle.before_request(flight.url, wait=False):
+                # Over the host's rate limit: give the slot back and queue again shortly,
+                # instead of blocking the GUI or holding a slot other hosts could use
+                scheduler.release(flight.ticket)
+                QTimer.singleShot(THROTTLE_RETRY_MS, lambda: self._queue(flight))
+                return
+        except CircuitOpenError:
+            self._fail(flight)
+            return
+
+        self.downloads += 1
+        # Conditional when a stale copy is stored
+        flight.reply = self.manager().get(self.cache.make_request(flight.url))
+        flight.reply.finished.connect(lambda: self._finished(flight))
+
+    def _fail(self, flight):
+        scheduler.release(flight.ticket)
+        if self.flights.get(flight.url) is flight:
+            del self.flights[flight.url]
+        for request in flight.waiters:
+            request.deliver(None)
+
+    def _finished(self, flight):
+        reply = flight.reply
+        error = reply.error()
+        scheduler.release(flight.ticket)
+        if error == QNetworkReply.OperationCanceledError:
+            # Aborted by cancel(): says nothing about the host, but a half-open
+            # probe must not stay in flight
+            throttle.release_probe(flight.url)
+            reply.deleteLater()
+            return
+
+        throttle.record(flight.url, error == QNetworkReply.NoError)
+        if self.flights.get(flight.url) is flight:
+            del self.flights[flight.url]
+
+        if error != QNetworkReply.NoError:
+            logging.warning(f"Poster {flight.url} failed: {reply.errorString()}")
+            self._fail(flight)
+        else:
+            waiters = list(flight.waiters)
+
+            def deliver(size, image):
+                for request in waiters:
+                    if request.size == size:
+                        request.deliver(image)
+
+            # Stored once, decoded once per distinct size, off the GUI thread
+            sizes = list(dict.fromkeys(request.size for request in waiters))
+            self.cache.from_reply(flight.url, reply, sizes, deliver)
+        reply.deleteLater()
+
+
+poster_fetcher = PosterFetcher()
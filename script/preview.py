@@ -0,0 +1,102 @@
+import base64
+import logging
+
+from PySide6.QtCore import Qt, QBuffer, QByteArray, QIODevice
+from PySide6.QtGui import QImage, QPixmap, QColor
+
+from script.catalog import catalog
+
+# Stored thumbnail: 2:3 like the cards. At this size PNG is ~250 bytes, a JPEG's
+# header tables alone are bigger than that
+PREVIEW_SIZE = (8, 12)
+# The dominant colour is looked for in a copy reduced to this many px per side,
+# with every channel bucketed to COLOR_BITS bits
+COLOR_SAMPLE = 16
+COLOR_BITS = 4
+
+
+def dominant_color(image):
+    """'#rrggbb' of the most common colour (bucketed) in a QImage"""
+    small = image.scaled(COLOR_SAMPLE, COLOR_SAMPLE, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+    small = small.convertToFormat(QImage.Format_RGB32)
+    shift = 8 - COLOR_BITS
+    buckets = {}
+    for y in range(small.height()):
+        for x in range(small.width()):
+            color = QColor(small.pixel(x, y))
+            r, g, b = color.red(), color.green(), color.blue()
+            bucket = buckets.setdefault((r >> shift, g >> shift, b >> shift), [0, 0, 0, 0])
+            bucket[0] += 1
+            bucket[1] += r
+            bucket[2] += g
+            bucket[3] += b
+    count, r, g, b = max(buckets.values())
+    return QColor(r // count, g // count, b // count).name()
+
+
+def make_preview(image):
+    """
+    {"preview_color": '#rrggbb', "preview": base64 PNG} for a decoded poster, in the
+    shape catalog items carry them. None for an empty image. Safe on worker threads.
+    """
+    if image is None or image.isNull():
+        return None
+    tiny = image.scaled(*PREVIEW_SIZE, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.WriteOnly)
+    tiny.convertToFormat(QImage.Format_RGB888).save(buffer, "PNG")
+    buffer.close()
+    return {
+        "preview_color": dominant_color(image),
+        "preview": base64.b64encode(data.data()).decode("ascii"),
+    }
+
+
+def save_preview(url, image):
+    """Store the preview of a freshly downloaded poster with every title showing it"""
+    fields = make_preview(image)
+    if fields:
+        catalog.set_preview(url, fields["preview_color"], fields["preview"])
+
+
+def fill_preview(url, image):
+    """Store the preview of a poster read from the disk cache if its titles have none yet"""
+    if catalog.needs_preview(url):
+        save_preview(url, image)
+
+
+def preview_key(item):
+    """Render cache key for the item's preview, None when it has none"""
+    if not isinstance(item, dict):
+        return None
+    if item.get("preview"):
+        return "preview", item["preview"]
+    if item.get("preview_color"):
+        return "preview", item["preview_color"]
+    return None
+
+
+def preview_pixmap(item, size):
+    """
+    Card-sized QPixmap from the stored preview: the tiny thumbnail scaled up (which
+    blurs it), or a plain fill with the dominant colour. None without a preview.
+    """
+    if preview_key(item) is None:
+        return None
+    w, h = size
+    if item.get("preview"):
+        try:
+            image = QImage.fromData(base64.b64decode(item["preview"]))
+        except ValueError as e:
+            logging.debug(f"Bad preview for {item.get('title')}: {e}")
+            image = QImage()
+        if not image.isNull():
+            return QPixmap.fromImage(image.scaled(w, h, Qt.IgnoreAspectRatio, Qt.SmoothTransformation))
+
+    color = QColor(item.get("preview_color") or "")
+    if not color.isValid():
+        return None
+    pixmap = QPixmap(w, h)
+    pixmap.fill(color)
+    return pixmap
@@ -0,0 +1,141 @@
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from PySide6.QtCore import QObject, Signal
+
+from script.http_client import http
+from script.poster_cache import poster_cache
+from script.preview import make_preview
+from script.catalog import item_key
+from script.pars import fetch_random_title
+from script.scheduler import scheduler, PREFETCH
+
+
+class RandomPool(QObject):
+    """
+    Keeps a stock of random titles with already decoded posters, so a "Random"
+    click is served from memory. Refills in the background below low_water.
+    """
+    ready_changed = Signal(int)
+
+    def __init__(self, size=24, low_water=12, workers=4, poster_size=(240, 360), parent=None):
+        super().__init__(parent)
+        self.size = size
+        self.low_water = low_water
+        self.workers = workers
+        self.poster_size = poster_size
+        # Device pixels, the size grids ask the poster cache for; taken here on the GUI thread
+        self.pixel_size = poster_cache.pixel_size(poster_size)
+        # Titles served recently are not taken into the pool again
+        self.recent_keys = deque(maxlen=200)
+        self.duplicates = 0
+
+        self._items = deque()
+        self._lock = threading.Lock()
+        self._refilling = False
+        self._stopped = False
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+
+    def ready_count(self):
+        with self._lock:
+            return len(self._items)
+
+    def take(self, count=12):
+        """Return [(item, QImage or None), ...] or [] when fewer than count are ready"""
+        with self._lock:
+            if len(self._items) < count:
+                taken = []
+            else:
+                taken = [self._items.popleft() for _ in range(count)]
+                self.recent_keys.extend(item_key(item) for item, _ in taken)
+            left = len(self._items)
+
+        self.ready_changed.emit(left)
+        if left < self.low_water:
+            self.refill()
+        return taken
+
+    def refill(self):
+        with self._lock:
+            if self._refilling or self._stopped:
+                return
+            self._refilling = True
+        threading.Thread(target=self._refill, name="random-pool", daemon=True).start()
+
+    def stop(self):
+        self._stopped = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _refill(self):
+        failures = 0
+        try:
+            while not self._stopped:
+                missing = self.size - self.ready_count()
+                if missing <= 0:
+                    break
+
+                futures = [self._executor.submit(self._fetch_one) for _ in range(min(missing, self.workers))]
+                for future in as_completed(futures):
+                    try:
+                        item, image = future.result()
+                    except Exception as e:
+                        failures += 1
+                        logging.warning(f"Random pool fetch failed: {e}")
+                        continue
+                    failures = 0
+                    self._add(item, image)
+
+                # Offline or API down: stop instead of spinning, the next take() retries
+                if failures >= self.workers * 2:
+                    logging.warning("Random pool refill gave up after repeated failures")
+                    break
+        finally:
+            with self._lock:
+                self._refilling = False
+
+    def _fetch_one(self):
+        # Stocking up for a future click, behind anything the user is waiting for
+        with scheduler.priority(PREFETCH):
+            return self._fetch_title()
+
+    def _fetch_title(self):
+        item = fetch_random_title()
+        if self._is_known(item_key(item)):
+            # Skip the poster download for a title we already have
+            return item, None
+
+        image = None
+        url = item.get("image", "")
+        if url.startswith("http"):
+            try:
+                # Decoded straight at the card size in device pixels, as the grids ask for it
+                image, fresh = poster_cache.lookup(url, self.pixel_size)
+                if image is None or not fresh:
+                    response = http.get(url)
+                    response.raise_for_status()
+                    image = poster_cache.store(url, response.content, response.headers.get("ETag"),
+                                               response.headers.get("Last-Modified"), size=self.pixel_size)
+            except Exception as e:
+                logging.warning(f"Random pool poster failed: {e}")
+                image = None
+        if image is not None and "preview" not in item:
+            # The title is not in the catalog yet, so the preview travels with the item
+            item.update(make_preview(image) or {})
+        return item, image
+
+    def _is_known(self, key):
+        with self._lock:
+            return key in self.recent_keys or any(item_key(item) == key for item, _ in self._items)
+
+    def _add(self, item, image):
+        key = item_key(item)
+        with self._lock:
+            if key in self.recent_keys or any(item_key(i) == key for i, _ in self._items):
+                # title/random happily repeats itself
+                self.duplicates += 1
+                return
+            self._items.append((item, image))
+            count = len(self._items)
+        self.ready_changed.emit(count)
@@ -0,0 +1,119 @@
+from collections import OrderedDict
+
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QPixmap, QPainter, QGuiApplication
+
+RENDER_BYTES = 48 * 1024 * 1024
+
+
+def device_pixel_ratio():
+    app = QGuiApplication.instance()
+    screen = app.primaryScreen() if app else None
+    return screen.devicePixelRatio() if screen else 1.0
+
+
+class RenderCache:
+    """
+    Finished card thumbnails: scaled to the card, corners rounded, at the screen's
+    device pixel ratio. Keyed by (source key, size, radius, dpr, aspect mode), so
+    showing a grid again is a dict lookup instead of scaling and masking.
+    Masks are shared per (size, radius, dpr). GUI thread only (QPixmap).
+    """
+
+    def __init__(self, max_bytes=RENDER_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._items = OrderedDict()
+        self._masks = {}
+        self._bitmaps = {}
+        self.hits = 0
+        self.renders = 0
+
+    def key(self, source_key, size, radius, dpr, aspect):
+        return source_key, tuple(size), radius, dpr, aspect
+
+    def rounded_mask(self, size, radius, dpr):
+        """Antialiased alpha mask, drawn once per size"""
+        mask_key = (size, radius, dpr)
+        mask = self._masks.get(mask_key)
+        if mask is None:
+            w, h = size
+            mask = QPixmap(round(w * dpr), round(h * dpr))
+            mask.setDevicePixelRatio(dpr)
+            mask.fill(Qt.transparent)
+            painter = QPainter(mask)
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(Qt.white)
+            painter.drawRoundedRect(0, 0, w, h, radius, radius)
+            painter.end()
+            self._masks[mask_key] = mask
+        return mask
+
+    def widget_mask(self, size, radius):
+        """1-bit mask for QWidget.setMask, shared by every card of that size"""
+        bitmap_key = (size, radius)
+        bitmap = self._bitmaps.get(bitmap_key)
+        if bitmap is None:
+            bitmap = self.rounded_mask(size, radius, 1.0).mask()
+            self._bitmaps[bitmap_key] = bitmap
+        return bitmap
+
+    def get(self, source_key, size, radius, dpr=None, aspect=Qt.IgnoreAspectRatio):
+        dpr = dpr or device_pixel_ratio()
+        key = self.key(source_key, size, radius, dpr, aspect)
+        pixmap = self._items.get(key)
+        if pixmap is not None:
+            self._items.move_to_end(key)
+            self.hits += 1
+        return pixmap
+
+    def thumbnail(self, source_key, source, size, radius, dpr=None, aspect=Qt.IgnoreAspectRatio):
+        """
+        Cached thumbnail for source_key, rendering it from source (QPixmap or QImage)
+        on a miss. source_key None renders without caching.
+        """
+        dpr = dpr or device_pixel_ratio()
+        if source_key is not None:
+            cached = self.get(source_key, size, radius, dpr, aspect)
+            if cached is not None:
+                return cached
+
+        if not isinstance(source, QPixmap):
+            source = QPixmap.fromImage(source)
+        pixmap = self.render(source, size, radius, dpr, aspect)
+        self.renders += 1
+        if source_key is not None:
+            self.put(self.key(source_key, size, radius, dpr, aspect), pixmap)
+        return pixmap
+
+    def render(self, source, size, radius, dpr, aspect):
+        w, h = size
+        pw, ph = round(w * dpr), round(h * dpr)
+        scaled = source.scaled(pw, ph, aspect, Qt.SmoothTransformation)
+
+        result = QPixmap(pw, ph)
+        result.fill(Qt.transparent)
+        painter = QPainter(result)
+        # Centre (and crop) like the QGraphicsView the cards used to rely on
+        painter.drawPixmap((pw - scaled.width()) // 2, (ph - scaled.height()) // 2, scaled)
+        painter.setCompositionMode(QPainter.CompositionMode_DestinationIn)
+        mask = self.rounded_mask(size, radius, dpr)
+        painter.drawPixmap(0, 0, mask.width(), mask.height(), mask)
+        painter.end()
+        result.setDevicePixelRatio(dpr)
+        return result
+
+    def put(self, key, pixmap):
+        size = pixmap.width() * pixmap.height() * 4
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.bytes -= old.width() * old.height() * 4
+        self._items[key] = pixmap
+        self.bytes += size
+        while self.bytes > self.max_bytes and self._items:
+            _, evicted = self._items.popitem(last=False)
+            self.bytes -= evicted.width() * evicted.height() * 4
+
+
+render_cache = RenderCache()
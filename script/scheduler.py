@@ -0,0 +1,216 @@
+import heapq
+import logging
+import itertools
+import threading
+from contextlib import contextmanager
+
+import requests
+from PySide6.QtCore import QObject, QThread, Signal
+
+# Priority classes, most urgent first
+INTERACTIVE = 0     # API calls the user is waiting for (top list, random, episodes)
+VISIBLE = 1         # posters of cards on screen
+PREFETCH = 2        # off-screen posters, random pool
+BACKGROUND = 3      # catalog sync, dump import
+
+CLASS_NAMES = {INTERACTIVE: "interactive", VISIBLE: "visible", PREFETCH: "prefetch", BACKGROUND: "background"}
+
+# Requests of one class allowed to run at the same time
+CLASS_LIMITS = {INTERACTIVE: 4, VISIBLE: 6, PREFETCH: 2, BACKGROUND: 1}
+# Requests of all classes together
+TOTAL_LIMIT = 8
+# Slots of the total only INTERACTIVE may use, so posters and sync can never
+# make the user's own API calls wait
+INTERACTIVE_RESERVE = 2
+# How often a thread waiting in slot() checks for shutdown / interruption (seconds)
+WAIT_POLL = 0.2
+
+
+class SchedulerStopped(requests.ConnectionError):
+    """Raised by slot() when the app shuts down or the waiting QThread is interrupted"""
+
+
+class Ticket:
+    WAITING = "waiting"
+    RUNNING = "running"
+    DONE = "done"
+
+    def __init__(self, priority, seq, name=None, start=None):
+        self.priority = priority
+        self.seq = seq
+        self.name = name
+        # GUI tickets are started through a callback, thread tickets wait on the event
+        self.start = start
+        self.event = threading.Event() if start is None else None
+        self.state = self.WAITING
+        # Priority the ticket holds a running slot under
+        self.running_class = None
+
+
+class NetworkScheduler(QObject):
+    """
+    Orders network work across the app by priority class, with per-class and total
+    concurrency limits. Worker threads block in slot(); GUI code submit()s a start
+    callback that runs on the GUI thread once a slot is free. A waiting ticket can be
+    moved up with raise_priority(), e.g. when its card scrolls into view.
+    """
+    granted = Signal(object)
+
+    def __init__(self, limits=None, total_limit=TOTAL_LIMIT, reserve=INTERACTIVE_RESERVE, parent=None):
+        super().__init__(parent)
+        self.limits = dict(CLASS_LIMITS)
+        self.limits.update(limits or {})
+        self.total_limit = total_limit
+        self.reserve = reserve
+        self._stopped = False
+        self.running = {priority: 0 for priority in self.limits}
+        self._queue = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # Queued to the GUI thread when a worker thread frees the slot
+        self.granted.connect(self._run_start)
+
+    # Priority of the current thread, for code that does not pass one explicitly
+
+    def current_priority(self):
+        return getattr(self._local, "priority", INTERACTIVE)
+
+    @contextmanager
+    def priority(self, priority):
+        previous = self.current_priority()
+        self._local.priority = priority
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    # Worker threads
+
+    @contextmanager
+    def slot(self, priority=None, name=None):
+        """
+        Block the calling (non-GUI) thread until a slot of its class is free.
+        Raises SchedulerStopped instead when shutdown() is called or the calling
+        QThread is asked to stop while it waits.
+        """
+        priority = self.current_priority() if priority is None else priority
+        if self._stopped:
+            raise SchedulerStopped(f"Network scheduler stopped, {name} not sent")
+        with self._lock:
+            ticket = Ticket(priority, next(self._seq), name)
+            heapq.heappush(self._queue, (priority, ticket.seq, ticket))
+            granted = self._dispatch()
+        self._start_granted(granted)
+        if not self._wait(ticket):
+            self.release(ticket)
+            raise SchedulerStopped(f"Network scheduler stopped, {name} not sent")
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    # GUI thread
+
+    def submit(self, priority, start, name=None):
+        """
+        Call start(ticket) on the GUI thread once there is a slot; release(ticket) when done.
+        With a free slot start runs before submit() returns, so it must use the ticket
+        it is given rather than the return value.
+        """
+        with self._lock:
+            ticket = Ticket(priority, next(self._seq), name, start)
+            heapq.heappush(self._queue, (priority, ticket.seq, ticket))
+            granted = self._dispatch()
+        self._start_granted(granted)
+        return ticket
+
+    def raise_priority(self, ticket, priority):
+        """Move a waiting ticket to a more urgent class; running ones keep their slot"""
+        with self._lock:
+            if ticket.state != Ticket.WAITING or priority >= ticket.priority:
+                return
+            # The old heap entry is skipped by _dispatch since the priorities no longer match
+            ticket.priority = priority
+            heapq.heappush(self._queue, (priority, ticket.seq, ticket))
+            granted = self._dispatch()
+        self._start_granted(granted)
+
+    def cancel(self, ticket):
+        """Drop a waiting ticket, or free the slot of a running one"""
+        self.release(ticket)
+
+    def release(self, ticket):
+        with self._lock:
+            if ticket.state == Ticket.RUNNING:
+                self.running[ticket.running_class] -= 1
+            ticket.state = Ticket.DONE
+            granted = self._dispatch()
+        self._start_granted(granted)
+
+    def shutdown(self):
+        """Wake every thread waiting in slot() and refuse new ones (on app exit)"""
+        with self._lock:
+            self._stopped = True
+            waiting = [ticket for _, _, ticket in self._queue if ticket.event is not None]
+        for ticket in waiting:
+            ticket.event.set()
+
+    def _wait(self, ticket):
+        # True once the ticket holds a slot, False when waiting was given up
+        while True:
+            if ticket.event.wait(WAIT_POLL):
+                return not self._stopped  # shutdown() sets the event too, to wake the thread
+            if self._stopped or QThread.currentThread().isInterruptionRequested():
+                return False
+
+    def stats(self):
+        with self._lock:
+            waiting = sum(1 for priority, _, ticket in self._queue
+                          if ticket.state == Ticket.WAITING and ticket.priority == priority)
+            running = {CLASS_NAMES[p]: n for p, n in self.running.items()}
+        return {"waiting": waiting, "running": running}
+
+    def _dispatch(self):
+        # Called with the lock held. Takes tickets in priority order; a ticket whose
+        # class is at its limit is passed over so other classes can still run.
+        # Non-interactive classes share the total minus the interactive reserve.
+        # Returns the GUI tickets granted a slot, to be started once the lock is released.
+        granted = []
+        skipped = []
+        while self._queue and sum(self.running.values()) < self.total_limit:
+            priority, seq, ticket = heapq.heappop(self._queue)
+            if ticket.state != Ticket.WAITING or ticket.priority != priority:
+                continue  # finished, cancelled or re-queued under another priority
+            shared_full = (priority != INTERACTIVE
+                           and sum(self.running.values()) >= self.total_limit - self.reserve)
+            if self.running[priority] >= self.limits[priority] or shared_full:
+                skipped.append((priority, seq, ticket))
+                continue
+            ticket.state = Ticket.RUNNING
+            ticket.running_class = priority
+            self.running[priority] += 1
+            if ticket.event is not None:
+                ticket.event.set()
+            else:
+                granted.append(ticket)
+        for entry in skipped:
+            heapq.heappush(self._queue, entry)
+        return granted
+
+    def _start_granted(self, granted):
+        # Outside the lock: start callbacks may submit or release tickets themselves
+        for ticket in granted:
+            self.granted.emit(ticket)
+
+    def _run_start(self, ticket):
+        if ticket.state != Ticket.RUNNING:
+            return
+        try:
+            ticket.start(ticket)
+        except Exception as e:
+            logging.error(f"Scheduled start of {ticket.name} failed: {e}", exc_info=True)
+            self.release(ticket)
+
+
+scheduler = NetworkScheduler()
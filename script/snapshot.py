@@ -0,0 +1,169 @@
+"""
+Compact binary snapshot of a title list, read through mmap.
+
+Layout (little endian):
+    header   MAGIC, version u16, field count u16, record count u32
+    index    record count x field count x (offset u32, length u32) into the heap
+    heap     UTF-8 strings; non-string values are stored as JSON text
+
+A page only touches its own index records and the heap bytes they point to,
+so showing 8 cards out of thousands does not parse the rest of the file.
+
+    python -m script.snapshot data/online/rec_anime.json [out.snap]
+"""
+import os
+import sys
+import json
+import mmap
+import struct
+import logging
+from pathlib import Path
+
+from script.json_stream import iter_file_items
+
+MAGIC = b"NKSNAP\0\0"
+VERSION = 1
+HEADER = struct.Struct("<8sHHI")
+SLOT = struct.Struct("<II")
+MISSING = 0xFFFFFFFF
+
+# (field, kind): "str" is stored as is, "json" goes through json.dumps/loads
+FIELDS = (
+    ("id", "json"),
+    ("code", "str"),
+    ("title", "str"),
+    ("title_ru", "str"),
+    ("title_original", "str"),
+    ("origin_lang", "str"),
+    ("is_donghua", "json"),
+    ("image", "str"),
+    ("genre", "str"),
+    ("status", "str"),
+    ("description", "str"),
+    ("description_ru", "str"),
+    ("rating", "json"),
+    ("updated", "json"),
+    ("episodes", "json"),
+)
+
+
+def snapshot_path_for(json_path):
+    return Path(json_path).with_suffix(".snap")
+
+
+def write_snapshot(items, path):
+    """Write an iterable of title dicts; returns the number of records"""
+    path = Path(path)
+    index = bytearray()
+    heap = bytearray()
+    count = 0
+
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        for name, kind in FIELDS:
+            value = item.get(name)
+            if value is None:
+                index += SLOT.pack(MISSING, 0)
+                continue
+            if kind == "str" and isinstance(value, str):
+                data = value.encode("utf-8")
+            else:
+                data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+            index += SLOT.pack(len(heap), len(data))
+            heap += data
+        count += 1
+
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(FIELDS), count))
+        f.write(index)
+        f.write(heap)
+    os.replace(tmp, path)
+    return count
+
+
+def convert_json(json_path, snapshot_path=None):
+    """Build a snapshot from one of the data/online/*.json lists"""
+    snapshot_path = snapshot_path or snapshot_path_for(json_path)
+    count = write_snapshot(iter_file_items(json_path), snapshot_path)
+    logging.info(f"Snapshot {snapshot_path}: {count} records from {json_path}")
+    return snapshot_path
+
+
+def ensure_snapshot(json_path):
+    """Path of an up-to-date snapshot for json_path, converting it when missing or stale"""
+    json_path = Path(json_path)
+    snap = snapshot_path_for(json_path)
+    if not snap.exists() or snap.stat().st_mtime < json_path.stat().st_mtime:
+        convert_json(json_path, snap)
+    return snap
+
+
+class Snapshot:
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # mmap refuses empty files
+            self._file.close()
+            raise ValueError(f"{self.path} is empty")
+
+        magic, version, field_count, self.count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION or field_count != len(FIELDS):
+            self.close()
+            raise ValueError(f"{self.path} is not a v{VERSION} snapshot")
+
+        self.record_size = field_count * SLOT.size
+        self.heap_offset = HEADER.size + self.count * self.record_size
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def record(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        base = HEADER.size + index * self.record_size
+        item = {}
+        for i, (name, kind) in enumerate(FIELDS):
+            offset, length = SLOT.unpack_from(self._map, base + i * SLOT.size)
+            if offset == MISSING:
+                continue
+            start = self.heap_offset + offset
+            text = self._map[start:start + length].decode("utf-8")
+            item[name] = text if kind == "str" else json.loads(text)
+        return item
+
+    def records(self, offset=0, limit=None):
+        end = self.count if limit is None else min(self.count, offset + limit)
+        return [self.record(i) for i in range(max(offset, 0), end)]
+
+
+def read_page(json_path, offset=0, limit=8):
+    """First `limit` records of a JSON list, served from its snapshot"""
+    with Snapshot(ensure_snapshot(json_path)) as snap:
+        return snap.records(offset, limit)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) < 2:
+        print("usage: python -m script.snapshot <list.json> [out.snap]")
+        sys.exit(1)
+    out = convert_json(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+    with Snapshot(out) as snap:
+        print(f"{out}: {len(snap)} records")
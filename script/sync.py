@@ -0,0 +1,100 @@
+import time
+import logging
+
+from PySide6.QtCore import QThread, Signal
+
+from script.http_client import http
+from script.catalog import catalog
+from script.pars import API_URL, FETCH_PROFILES, ingest_titles, stream_titles
+from script.scheduler import scheduler, BACKGROUND
+
+# Catalog sync_state key holding the high-water mark (unix time of the newest change seen)
+SINCE_KEY = "changes_since"
+# How far back the first sync looks when the catalog has nothing to start from
+INITIAL_WINDOW = 24 * 60 * 60
+
+
+class CatalogSync:
+    """Pulls only titles changed since the last sync from title/changes and merges them into the catalog."""
+
+    def __init__(self, catalog=catalog, client=http, base_url=API_URL, page_size=50, max_pages=20):
+        self.catalog = catalog
+        self.client = client
+        self.base_url = base_url
+        self.page_size = page_size
+        self.max_pages = max_pages
+
+    def high_water_mark(self):
+        value = self.catalog.get_state(SINCE_KEY)
+        if value is not None:
+            try:
+                return int(float(value))
+            except ValueError:
+                logging.warning(f"Bad sync mark {value!r}, starting over")
+
+        latest = self.catalog.latest_update()
+        if latest:
+            return int(latest)
+        return int(time.time()) - INITIAL_WINDOW
+
+    def sync(self, should_stop=None):
+        """Returns the number of titles merged. The mark only moves after every page was read."""
+        url = f"{self.base_url}title/changes"
+        headers = {
+            'User-Agent': 'Mozilla/5.0',
+            'Accept': 'application/json'
+        }
+        since = self.high_water_mark()
+        newest = since
+        merged = 0
+        complete = False
+
+        for page in range(1, self.max_pages + 1):
+            if should_stop and should_stop():
+                break
+
+            params = dict(FETCH_PROFILES["summary"], since=since, page=page, items_per_page=self.page_size)
+            meta = {}
+            changed = []
+
+            def track(item):
+                changed.append(item.get('updated') or 0)
+
+            # Each title is stored as soon as it is parsed out of the response
+            count = ingest_titles(stream_titles(url, params=params, headers=headers, meta=meta), on_item=track)
+            merged += count
+            if changed:
+                newest = max(newest, int(max(changed)))
+
+            pages = (meta.get('pagination') or {}).get('pages')
+            if not count or (pages and page >= pages):
+                complete = True
+                break
+
+        if complete:
+            self.catalog.set_state(SINCE_KEY, newest)
+        else:
+            logging.warning(f"Catalog sync stopped early after {merged} titles, mark stays at {since}")
+
+        logging.info(f"Catalog sync: {merged} changed titles since {since}")
+        return merged
+
+
+class SyncThread(QThread):
+    synced = Signal(int)
+    error_occurred = Signal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.engine = CatalogSync()
+
+    def run(self):
+        try:
+            # Lowest class: pages of changes wait while the user is loading anything
+            with scheduler.priority(BACKGROUND):
+                changed = self.engine.sync(should_stop=self.isInterruptionRequested)
+            self.synced.emit(changed)
+        except Exception as e:
+            error_msg = f"Catalog sync failed: {str(e)}"
+            logging.error(error_msg, exc_info=True)
+            self.error_occurred.emit(error_msg)
@@ -0,0 +1,169 @@
+import time
+import logging
+import threading
+from urllib.parse import urlsplit
+
+import requests
+
+# Per-host limits: sustained requests per second, burst size, and circuit breaker tuning.
+# Hosts that are not listed are neither throttled nor broken.
+THROTTLE_SETTINGS = {
+    "api.anilibria.tv": {"rate": 5, "burst": 10, "failures": 5, "reset_after": 30},
+    "anilibria.tv": {"rate": 10, "burst": 20, "failures": 8, "reset_after": 30},
+    "cache.libria.fun": {"rate": 10, "burst": 20, "failures": 5, "reset_after": 30},
+}
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised instead of sending a request to a host whose circuit is open."""
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self):
+        with self._lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    def acquire(self, timeout=None):
+        """Block until a token is free; False if that would take longer than timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failures` consecutive errors;
+    open -> half-open after `reset_after` seconds, letting one probe through;
+    half-open -> closed on a successful probe, back to open on a failed one.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, host, failures=5, reset_after=30):
+        self.host = host
+        self.failure_threshold = failures
+        self.reset_after = reset_after
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0
+        self.probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_after:
+                    return False
+                self.state = self.HALF_OPEN
+                self.probe_in_flight = False
+            if self.probe_in_flight:
+                return False
+            self.probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logging.info(f"Circuit for {self.host} closed again")
+            self.state = self.CLOSED
+            self.failures = 0
+            self.probe_in_flight = False
+
+    def release_probe(self):
+        """Give the half-open probe slot back when the probe was never sent"""
+        with self._lock:
+            self.probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logging.warning(f"Circuit for {self.host} opened after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class HostThrottle:
+    """Rate limiter and circuit breaker for every configured host."""
+
+    def __init__(self, settings=None):
+        self.settings = dict(THROTTLE_SETTINGS, **(settings or {}))
+        self.buckets = {}
+        self.breakers = {}
+        for host, conf in self.settings.items():
+            self.buckets[host] = TokenBucket(conf["rate"], conf["burst"])
+            self.breakers[host] = CircuitBreaker(host, conf["failures"], conf["reset_after"])
+
+    def host_of(self, url):
+        return urlsplit(url).hostname or ""
+
+    def before_request(self, url, wait=True, timeout=None):
+        """
+        Raise CircuitOpenError if the host is tripped, otherwise take a rate-limit token.
+        With wait=False (GUI thread) a missing token is reported as False instead of sleeping.
+        """
+        host = self.host_of(url)
+        breaker = self.breakers.get(host)
+        if breaker and not breaker.allow():
+            raise CircuitOpenError(f"{host} is unavailable, circuit open")
+
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            return True
+        got_token = bucket.acquire(timeout) if wait else bucket.try_acquire()
+        if not got_token and breaker:
+            # Nothing is sent, so give a half-open probe slot back
+            breaker.release_probe()
+        if not got_token and wait:
+            raise CircuitOpenError(f"{host} rate limit wait exceeded {timeout} s")
+        return got_token
+
+    def release_probe(self, url):
+        """The request let through by before_request() was not sent after all"""
+        breaker = self.breakers.get(self.host_of(url))
+        if breaker:
+            breaker.release_probe()
+
+    def record(self, url, ok):
+        breaker = self.breakers.get(self.host_of(url))
+        if breaker:
+            if ok:
+                breaker.record_success()
+            else:
+                breaker.record_failure()
+
+    def is_open(self, url):
+        breaker = self.breakers.get(self.host_of(url))
+        return breaker is not None and breaker.state == CircuitBreaker.OPEN
+
+
+throttle = HostThrottle()
@@ -2,6 +2,13 @@ import requests
 from bs4 import BeautifulSoup
 import demjson3
 
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from script.http_client import http
+
 HEADERS = {
     'User-Agent': 'Mozilla/5.0',
     'Referer': 'https://video.ufdub.com/'
@@ -23,7 +30,7 @@ def extract_js_array(script_text):
 
 def get_player_url_and_series(anime_url):
     # Отримуємо сторінку аніме
-    r = requests.get(anime_url, headers=HEADERS)
+    r = http.get(anime_url, headers=HEADERS)
     r.raise_for_status()
     soup = BeautifulSoup(r.text, 'html.parser')
 
@@ -35,7 +42,7 @@ def get_player_url_and_series(anime_url):
     player_url = iframe['src']
 
     # Отримуємо сторінку плеєра
-    r2 = requests.get(player_url, headers=HEADERS)
+    r2 = http.get(player_url, headers=HEADERS)
     r2.raise_for_status()
     soup2 = BeautifulSoup(r2.text, 'html.parser')
 
@@ -62,7 +69,7 @@ def check_video_exists(url, timeout=10):
     Інакше None.
     """
     try:
-        resp = requests.head(url, headers=HEADERS, allow_redirects=True, timeout=timeout)
+        resp = http.head(url, headers=HEADERS, allow_redirects=True, timeout=timeout)
         resp.raise_for_status()
     except requests.RequestException:
         return None
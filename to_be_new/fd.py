@@ -4,6 +4,13 @@ import demjson3
 from urllib.parse import urljoin
 import json
 
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from script.http_client import http
+
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
                   "AppleWebKit/537.36 (KHTML, like Gecko) "
@@ -22,7 +29,7 @@ def split_title(title_text):
 
 def search_anime(query):
     url = f"https://ufdub.com/index.php?do=search&subaction=search&story={requests.utils.quote(query)}"
-    r = requests.get(url, headers=HEADERS)
+    r = http.get(url, headers=HEADERS)
     r.raise_for_status()
     soup = BeautifulSoup(r.text, 'html.parser')
 
@@ -74,7 +81,7 @@ def extract_js_array(script_text):
 
 
 def get_player_url_and_series(anime_url):
-    r = requests.get(anime_url, headers=HEADERS)
+    r = http.get(anime_url, headers=HEADERS)
     r.raise_for_status()
     soup = BeautifulSoup(r.text, 'html.parser')
 
@@ -85,7 +92,7 @@ def get_player_url_and_series(anime_url):
 
     player_url = iframe['src']
 
-    r2 = requests.get(player_url, headers=HEADERS)
+    r2 = http.get(player_url, headers=HEADERS)
     r2.raise_for_status()
     soup2 = BeautifulSoup(r2.text, 'html.parser')
 
@@ -107,7 +114,7 @@ def get_player_url_and_series(anime_url):
 
 def check_video_exists(url, timeout=10):
     try:
-        resp = requests.head(url, headers=HEADERS, allow_redirects=True, timeout=timeout)
+        resp = http.head(url, headers=HEADERS, allow_redirects=True, timeout=timeout)
     except requests.RequestException:
         return None
 
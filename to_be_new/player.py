@@ -1,5 +1,4 @@
 import os
-import requests
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QFrame, QPushButton, QComboBox, QListWidget, QListWidgetItem,
@@ -10,6 +9,11 @@ from PySide6.QtCore import QUrl, Qt, QTime, QTimer, QEvent
 from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
 from PySide6.QtMultimediaWidgets import QVideoWidget
 import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from script.http_client import http
 
 BASE_URL = "https://anilibria.tv"
 CACHE_URL = "https://cache.libria.fun"
@@ -32,7 +36,7 @@ class EpisodeItemWidget(QWidget):
         if self.episode_data.get("preview"):
             preview_url = BASE_URL + self.episode_data["preview"]
             try:
-                response = requests.get(preview_url)
+                response = http.get(preview_url)
                 pixmap = QPixmap()
                 pixmap.loadFromData(response.content)
                 pixmap = pixmap.scaled(80, 45, Qt.KeepAspectRatio, Qt.SmoothTransformation)
@@ -3,6 +3,13 @@ import urllib.parse
 import time
 import json
 
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from script.http_client import http
+
 def check_video_url(series_url, timeout=10):
     """
     Перевіряє URL серії:
@@ -14,7 +21,7 @@ def check_video_url(series_url, timeout=10):
     """
     headers = {"User-Agent": "Mozilla/5.0"}
     try:
-        resp = requests.head(series_url, headers=headers, allow_redirects=True, timeout=timeout)
+        resp = http.head(series_url, headers=headers, allow_redirects=True, timeout=timeout)
     except requests.RequestException:
         return None
 